@@ -0,0 +1,114 @@
+#! /usr/bin/env python3
+"""
+Load test for the asyncio API.
+
+A stand-in client fires concurrent requests with large payloads
+in a mix of encodings, including ones with pure-Python decoders,
+while a heartbeat task measures how late the event loop wakes it up.
+The same load is run with the blocking decode_all() called directly
+on the loop, with decode_all_async() on threads, and on processes:
+first with a cold pool, as the first requests of a server meet it,
+then with the pool already running.
+Every run gets freshly generated payloads, so that none of them
+benefits from anything cached by an earlier one.
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import try_decodings  # noqa: E402
+
+HEARTBEAT_INTERVAL = 0.005
+ENCODINGS = ("Base64", "Ascii85", "Uuencoding", "ROT13", "Percent-encoding")
+
+
+async def heartbeat(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(loop.time() - expected)
+
+
+async def blocking_client(payload):
+    # What a naive request handler does today.
+    return try_decodings.decode_all(payload)
+
+
+async def thread_client(payload):
+    return await try_decodings.decode_all_async(payload, processes=False)
+
+
+async def process_client(payload):
+    return await try_decodings.decode_all_async(payload, processes=True)
+
+
+def make_payloads(count, size):
+    payloads = []
+    for i in range(count):
+        # Base64 text, so that ROT13 and percent-encoding work too.
+        plain = base64.standard_b64encode(os.urandom(size * 3 // 4))
+        encoding = ENCODINGS[i % len(ENCODINGS)]
+        payloads.append(try_decodings.encode_string_funcs[encoding](plain))
+    return payloads
+
+
+async def run_load(client, payloads):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(lags, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 4)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, lags
+
+
+def report(label, elapsed, lags):
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0
+    print(
+        "{:9} : {:6.2f} s total, loop lag median {:7.2f} ms, "
+        "p99 {:7.2f} ms, max {:7.2f} ms".format(
+            label,
+            elapsed,
+            statistics.median(lags_ms) if lags_ms else 0.0,
+            p99,
+            lags_ms[-1] if lags_ms else 0.0,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--requests", type=int, default=8, help="Concurrent requests"
+    )
+    parser.add_argument(
+        "--size", type=int, default=1024 * 1024, help="Payload bytes"
+    )
+    args = parser.parse_args()
+    # The first process run starts the pool's fork server and workers.
+    try_decodings.discard_process_pool()
+    clients = (
+        ("blocking", blocking_client),
+        ("threads", thread_client),
+        ("cold pool", process_client),
+        ("processes", process_client),
+    )
+    for label, client in clients:
+        payloads = make_payloads(args.requests, args.size)
+        elapsed, lags = asyncio.run(run_load(client, payloads))
+        report(label, elapsed, lags)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#! /usr/bin/env python3
+"""
+Compare `try_decodings.py --reverse` with coreutils base64 and base32.
+
+Each command encodes the same random file to /dev/null;
+the best of a few runs is reported in MiB/s of input.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, "try_decodings.py")
+
+
+def best_time(command, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mib", type=int, default=256, help="Input size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile() as f:
+        for _ in range(args.mib):
+            f.write(os.urandom(1024 * 1024))
+        f.flush()
+        for encoding, tool in (("Base64", "base64"), ("Base32", "base32")):
+            commands = [
+                ("try_decodings", [sys.executable, SCRIPT, "-r", encoding]),
+            ]
+            if shutil.which(tool):
+                commands.insert(0, ("coreutils " + tool, [tool]))
+            for label, command in commands:
+                elapsed = best_time(command + [f.name], args.repeat)
+                print(
+                    "{:8} {:18}: {:8.1f} MiB/s".format(
+                        encoding, label, args.mib / elapsed
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
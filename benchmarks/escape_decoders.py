@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+"""
+Time the escape-sequence decoders on input without any escapes
+and on input made by their own encoder, next to the stdlib's
+quopri, urllib and html decoders for the families it covers,
+and all of them together from one scan, as decode_all() runs them.
+"""
+
+import argparse
+import html
+import os
+import quopri
+import sys
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import try_decodings  # noqa: E402
+
+ENCODINGS = (
+    "MIME quoted-printable",
+    "Percent-encoding",
+    "HTML",
+    "Backslash escapes",
+    "JavaScript %u-encoding",
+    "SQL literals",
+)
+STDLIB = {
+    "MIME quoted-printable": quopri.decodestring,
+    "Percent-encoding": urllib.parse.unquote_to_bytes,
+    "HTML": lambda b: html.unescape(b.decode()).encode(),
+}
+
+
+def best_time(func, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kib", type=int, default=1024, help="Plain size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    words = b"plain text with numbers 0123 and CHAR names, lines\n"
+    plain = words * (args.kib * 1024 // len(words))
+    # Text, since the HTML and JavaScript encoders need UTF-8.
+    markup = "<p class='x'>café & naïve ☃ 100% = \\ \"y\"</p>\n".encode()
+    text = markup * (args.kib * 1024 // 2 // len(markup))
+    for encoding in ENCODINGS:
+        func = try_decodings.decode_string_funcs[encoding]
+        encoded = try_decodings.encode_string_funcs[encoding](text)
+        rows = [("plain", plain), ("encoded", encoded)]
+        for label, data in rows:
+            elapsed = best_time(func, data, args.repeat)
+            line = "{:22} {:7} {:5} KiB: {:8.1f} ms".format(
+                encoding, label, len(data) // 1024, elapsed * 1000
+            )
+            if encoding in STDLIB and label == "plain":
+                stdlib = best_time(STDLIB[encoding], data, args.repeat)
+                line += ", stdlib {:6.1f} ms".format(stdlib * 1000)
+            print(line)
+    mixed = b"".join(
+        try_decodings.encode_string_funcs[encoding](markup * 64)
+        for encoding in ENCODINGS
+    )
+    for label, data in (("plain", plain), ("mixed", mixed)):
+        together = best_time(
+            lambda d: try_decodings.decode_all(d, ENCODINGS), data, args.repeat
+        )
+        apart = best_time(
+            lambda d: [
+                try_decodings.decode_string_funcs[encoding](d)
+                for encoding in ENCODINGS
+            ],
+            data,
+            args.repeat,
+        )
+        print(
+            "{:22} {:7} {:5} KiB: {:8.1f} ms, one at a time {:6.1f} ms".format(
+                "All escapes",
+                label,
+                len(data) // 1024,
+                together * 1000,
+                apart * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+"""
+Report accuracy of try_decodings.predict_encodings() on fresh synthetic
+data, and the speedup of running only the top-k decoders.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import try_decodings  # noqa: E402
+from train_classifier import synthetic_samples  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    samples = list(synthetic_samples(rng, args.samples))
+    model = try_decodings.load_classifier_model()
+
+    top1 = topk = 0
+    classify_time = 0.0
+    for name, encoded in samples:
+        start = time.perf_counter()
+        ranked = try_decodings.predict_encodings(encoded, model)
+        classify_time += time.perf_counter() - start
+        top1 += ranked[0] == name
+        topk += name in ranked[: args.k]
+    print("samples      : {}".format(len(samples)))
+    print("top-1        : {:.1%}".format(top1 / len(samples)))
+    print("top-{}        : {:.1%}".format(args.k, topk / len(samples)))
+
+    # Only compare decoders the model was trained on
+    # (an encoder that is broken on this Python is left out of both runs).
+    known = list(model["encodings"])
+    start = time.perf_counter()
+    for name, encoded in samples:
+        try_decodings.decode_all(encoded, known)
+    all_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for name, encoded in samples:
+        ranked = try_decodings.predict_encodings(encoded, model)
+        try_decodings.decode_all(encoded, ranked[: args.k])
+    top_k_time = time.perf_counter() - start
+    print("all {} known : {:.3f} s".format(len(known), all_time))
+    print(
+        "top-{}        : {:.3f} s ({:.3f} s classifying)".format(
+            args.k, top_k_time, classify_time
+        )
+    )
+    print("speedup      : {:.2f}x".format(all_time / top_k_time))
+
+
+if __name__ == "__main__":
+    main()
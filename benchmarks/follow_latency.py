@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+"""
+Measure per-record latency of `try_decodings.py --follow`
+under a sustained synthetic input rate.
+
+Base64 lines are written to the script's stdin at a fixed rate,
+and the time until each record's output block appears is recorded.
+"""
+
+import argparse
+import base64
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, "try_decodings.py")
+HEADER_RE = re.compile(r"^==> record (\d+) <==$")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=float, default=200, help="Lines/second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--size", type=int, default=200, help="Bytes per line")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    count = int(args.rate * args.seconds)
+    rng = random.Random(0)
+    lines = [
+        base64.standard_b64encode(
+            bytes(rng.randrange(32, 127) for _ in range(args.size))
+        )
+        + b"\n"
+        for _ in range(count)
+    ]
+    proc = subprocess.Popen(
+        [sys.executable, SCRIPT, "--follow", "--workers", str(args.workers)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    sent = [None] * (count + 1)
+
+    def produce():
+        start = time.perf_counter()
+        for i, line in enumerate(lines, 1):
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent[i] = time.perf_counter()
+            proc.stdin.write(line)
+            proc.stdin.flush()
+        proc.stdin.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    latencies = []
+    for raw in proc.stdout:
+        match = HEADER_RE.match(raw.decode())
+        if match:
+            latencies.append(time.perf_counter() - sent[int(match.group(1))])
+    producer.join()
+    proc.wait()
+
+    latencies.sort()
+    print("records : {} at {:g}/s".format(len(latencies), args.rate))
+    for label, q in (("median", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        index = min(int(len(latencies) * q), len(latencies) - 1)
+        print("{:7} : {:.2f} ms".format(label, latencies[index] * 1000))
+    print("max     : {:.2f} ms".format(latencies[-1] * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+"""
+Throughput of try_decodings.parallel_decode() against the serial stdlib
+decoder, for 1, 2, 4, ... worker processes up to the number of cores.
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import try_decodings  # noqa: E402
+
+ENCODERS = {
+    "Base64": base64.encodebytes,  # wrapped at 76 characters
+    "Base32": base64.b32encode,
+    "Base16": base64.b16encode,
+}
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "encoding", nargs="?", default="Base64", choices=sorted(ENCODERS)
+    )
+    parser.add_argument("--mib", type=int, default=256, help="Decoded size")
+    args = parser.parse_args()
+
+    plain = os.urandom(args.mib * 1024 * 1024)
+    encoded = ENCODERS[args.encoding](plain)
+    serial = try_decodings._BLOCK_ENCODINGS[args.encoding][3]
+    mib = len(encoded) / (1024 * 1024)
+    print("{} MiB of {}".format(round(mib), args.encoding))
+
+    elapsed, result = timed(serial, encoded)
+    assert result == plain
+    print("stdlib      : {:8.1f} MiB/s".format(mib / elapsed))
+
+    workers = 1
+    base = None
+    while workers <= (os.cpu_count() or 1):
+        with try_decodings.new_process_pool(workers) as pool:
+            # Start the workers before timing.
+            list(pool.map(abs, range(workers)))
+            elapsed, result = timed(
+                try_decodings.parallel_decode, encoded, args.encoding, pool
+            )
+        assert result == plain
+        base = base or elapsed
+        print(
+            "{:2} workers : {:8.1f} MiB/s, {:5.2f}x".format(
+                workers, mib / elapsed, base / elapsed
+            )
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+"""
+Build encoding_model.json for try_decodings.predict_encodings().
+
+Random plain inputs (text, words, markup, binary) are encoded
+with every entry of encode_string_funcs, and the mean and variance
+of each feature are recorded per encoding.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import try_decodings  # noqa: E402
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog hello world example text "
+    "password user admin token secret key value error warning info debug "
+    "café naïve über ☃ 日本"
+).split()
+
+# Variances are floored so that features which are constant
+# in the training data do not make the model infinitely sure.
+MIN_VARIANCE = 1e-3
+
+
+def random_plain(rng):
+    size = rng.choice([8, 32, 100, 400, 2000, 10000])
+    size = int(size * rng.uniform(0.5, 1.5))
+    kind = rng.choice(["words", "printable", "markup", "binary", "lines"])
+    if kind == "words":
+        text = " ".join(rng.choice(WORDS) for _ in range(size // 5 + 1))
+        return text.encode()
+    if kind == "printable":
+        chars = (rng.choice(string.printable) for _ in range(size))
+        return "".join(chars).encode()
+    if kind == "markup":
+        parts = ['<a href="?q=1&x=2">', "café", " & ", "'x'", "<b>"]
+        chars = (rng.choice(parts + WORDS) for _ in range(size // 5 + 1))
+        return "".join(chars).encode()
+    if kind == "lines":
+        lines = (
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 20)))
+            for _ in range(size // 40 + 1)
+        )
+        return "\n".join(lines).encode()
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def synthetic_samples(rng, count):
+    """Yield (encoding name, encoded bytes) pairs."""
+    broken = set()
+    for _ in range(count):
+        plain = random_plain(rng)
+        for name, func in try_decodings.encode_string_funcs.items():
+            if name in broken:
+                continue
+            try:
+                encoded = func(plain)
+            except (UnicodeDecodeError, ValueError):
+                # e.g. ROT13 and HTML only work on UTF-8 text.
+                continue
+            except Exception as e:
+                logging.warning("skipping encoder {}: {!r}".format(name, e))
+                broken.add(name)
+                continue
+            yield name, encoded
+
+
+def train(samples):
+    features = {}
+    for name, encoded in samples:
+        features.setdefault(name, []).append(
+            try_decodings.encoding_features(encoded)
+        )
+    total = sum(len(rows) for rows in features.values())
+    encodings = {}
+    for name, rows in features.items():
+        columns = list(zip(*rows))
+        mean = [sum(c) / len(c) for c in columns]
+        var = [
+            max(sum((x - m) ** 2 for x in c) / len(c), MIN_VARIANCE)
+            for c, m in zip(columns, mean)
+        ]
+        encodings[name] = {
+            "prior": len(rows) / total,
+            "mean": [round(m, 6) for m in mean],
+            "var": [round(v, 6) for v in var],
+        }
+    return {
+        "features": list(try_decodings.FEATURE_NAMES),
+        "encodings": encodings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=try_decodings.CLASSIFIER_MODEL_FILE)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    model = train(synthetic_samples(rng, args.samples))
+    with open(args.output, "w") as f:
+        json.dump(model, f, indent=1)
+        f.write("\n")
+    print("wrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,117 @@
 #! /usr/bin/env python3
 
 import argparse
+import atexit
 import base64
 import binascii
+import bz2
 import codecs  # for ROT13
 import collections
+import concurrent.futures
+import functools
 import html
 import io
+import json
 import logging
+import math
+import multiprocessing.shared_memory
 import os
 import quopri
+import re
 import struct
 import sys
 import tempfile
+import threading
+import time
 import urllib.parse  # for percent-encoding.
+import weakref
+import zipfile
+import zlib
+
+try:
+    import lzma
+except ImportError:  # Python built without liblzma.
+    lzma = None
+
+try:
+    import numpy
+except ImportError:  # Only needed for the fast Ascii85/Base85/Base32 paths.
+    numpy = None
+
+"""
+Python 3.11 removed the hqx functions from binascii along with binhex.
+These replacements follow Modules/binascii.c from CPython 3.10.
+"""
+
+_HQX_ALPHABET = (
+    b"!\"#$%&'()*+,-012345689@ABCDEFGHIJKLMNPQRSTUVXYZ[`abcdefhijklmpqr"
+)
+_B64_ALPHABET = (
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+)
+_HQX_TO_B64 = bytes.maketrans(_HQX_ALPHABET, _B64_ALPHABET)
+_B64_TO_HQX = bytes.maketrans(_B64_ALPHABET, _HQX_ALPHABET)
+_HQX_RUNCHAR = 0x90
+_HQX_RLE_RUN_RE = re.compile(rb"\x90|([^\x90])\1{3,254}", re.DOTALL)
+_HQX_RLE_TOKEN_RE = re.compile(rb"\x90(.)|[^\x90]+|\x90", re.DOTALL)
+
+
+def _a2b_hqx(data):
+    """Decode 6-bit hqx text (stopping at ':'); return (bytes, done)."""
+    data = bytes(data)
+    colon = data.find(b":")
+    done = colon >= 0
+    if done:
+        data = data[:colon]
+    data = data.translate(None, b"\r\n")
+    if data.translate(None, _HQX_ALPHABET):
+        raise binascii.Error("Illegal char")
+    if len(data) % 4 and not done:
+        raise binascii.Incomplete("String has incomplete number of bytes")
+    # hqx is base64 with another alphabet and no padding.
+    padding = b"=" * (-len(data) % 4)
+    if len(data) % 4 == 1:
+        # Six bits are less than a byte: C drops them, base64 won't.
+        data, padding = data[:-1], b""
+    return binascii.a2b_base64(data.translate(_HQX_TO_B64) + padding), done
+
+
+def _b2a_hqx(data):
+    encoded = binascii.b2a_base64(bytes(data), newline=False)
+    return encoded.rstrip(b"=").translate(_B64_TO_HQX)
+
+
+def _rlecode_hqx(data):
+    def replace(match):
+        run = match.group()
+        if match.group(1) is None:
+            return b"\x90\x00"
+        return run[:1] + bytes([_HQX_RUNCHAR, len(run)])
+
+    return _HQX_RLE_RUN_RE.sub(replace, bytes(data))
+
+
+def _rledecode_hqx(data):
+    out = bytearray()
+    for match in _HQX_RLE_TOKEN_RE.finditer(bytes(data)):
+        token = match.group()
+        if token[0] != _HQX_RUNCHAR:
+            out += token
+        elif len(token) == 1:
+            raise binascii.Incomplete("String has incomplete number of bytes")
+        elif token[1] == 0:
+            out.append(_HQX_RUNCHAR)
+        elif not out:
+            raise binascii.Error("Orphaned RLE code at start")
+        else:
+            out += out[-1:] * (token[1] - 1)
+    return bytes(out)
+
+
+a2b_hqx = getattr(binascii, "a2b_hqx", _a2b_hqx)
+b2a_hqx = getattr(binascii, "b2a_hqx", _b2a_hqx)
+rlecode_hqx = getattr(binascii, "rlecode_hqx", _rlecode_hqx)
+rledecode_hqx = getattr(binascii, "rledecode_hqx", _rledecode_hqx)
 
 """
 Include the latest binhex source release before deprecation.
@@ -108,7 +206,7 @@ class _Hqxcoderengine:
         self.data = self.data[todo:]
         if not data:
             return
-        self.hqxdata = self.hqxdata + binascii.b2a_hqx(data)
+        self.hqxdata = self.hqxdata + b2a_hqx(data)
         self._flush(0)
 
     def _flush(self, force):
@@ -124,7 +222,7 @@ class _Hqxcoderengine:
 
     def close(self):
         if self.data:
-            self.hqxdata = self.hqxdata + binascii.b2a_hqx(self.data)
+            self.hqxdata = self.hqxdata + b2a_hqx(self.data)
         self._flush(1)
         self.ofp.close()
         del self.ofp
@@ -140,13 +238,13 @@ class _Rlecoderengine:
         self.data = self.data + data
         if len(self.data) < REASONABLY_LARGE:
             return
-        rledata = binascii.rlecode_hqx(self.data)
+        rledata = rlecode_hqx(self.data)
         self.ofp.write(rledata)
         self.data = b''
 
     def close(self):
         if self.data:
-            rledata = binascii.rlecode_hqx(self.data)
+            rledata = rlecode_hqx(self.data)
             self.ofp.write(rledata)
         self.ofp.close()
         del self.ofp
@@ -284,6 +382,9 @@ class _Hqxdecoderengine:
             if self.eof: return decdata
             wtd = ((wtd + 2) // 3) * 4
             data = self.ifp.read(wtd)
+            if not data:
+                # Without this, input missing its closing ':' loops forever.
+                raise BinHexError('Premature EOF on binhex file')
             #
             # Next problem: there may not be a complete number of
             # bytes in what we pass to a2b. Solve by yet another
@@ -291,7 +392,7 @@ class _Hqxdecoderengine:
             #
             while True:
                 try:
-                    decdatacur, self.eof = binascii.a2b_hqx(data)
+                    decdatacur, self.eof = a2b_hqx(data)
                     break
                 except binascii.Incomplete:
                     pass
@@ -328,7 +429,7 @@ class _Rledecoderengine:
         self.pre_buffer = self.pre_buffer + self.ifp.read(wtd + 4)
         if self.ifp.eof:
             self.post_buffer = self.post_buffer + \
-                binascii.rledecode_hqx(self.pre_buffer)
+                rledecode_hqx(self.pre_buffer)
             self.pre_buffer = b''
             return
 
@@ -356,7 +457,7 @@ class _Rledecoderengine:
             mark = mark - 1
 
         self.post_buffer = self.post_buffer + \
-            binascii.rledecode_hqx(self.pre_buffer[:mark])
+            rledecode_hqx(self.pre_buffer[:mark])
         self.pre_buffer = self.pre_buffer[mark:]
 
     def close(self):
@@ -367,18 +468,20 @@ class HexBin:
         if isinstance(ifp, str):
             ifp = io.open(ifp, 'rb')
         #
-        # Find initial colon.
+        # Find initial colon, a block at a time.
         #
         while True:
-            ch = ifp.read(1)
-            if not ch:
+            chunk = ifp.read(REASONABLY_LARGE)
+            if not chunk:
                 raise BinHexError("No binhex data found")
-            # Cater for \r\n terminated lines (which show up as \n\r, hence
-            # all lines start with \r)
-            if ch == b'\r':
-                continue
-            if ch == b':':
+            colon = chunk.find(b':')
+            if colon >= 0:
                 break
+        # Give back what was read past the colon.
+        if ifp.seekable():
+            ifp.seek(colon + 1 - len(chunk), io.SEEK_CUR)
+        else:
+            ifp = io.BytesIO(chunk[colon + 1:] + ifp.read())
 
         hqxifp = _Hqxdecoderengine(ifp)
         self.ifp = _Rledecoderengine(hqxifp)
@@ -430,7 +533,10 @@ class HexBin:
             n = self.dlen
         rv = b''
         while len(rv) < n:
-            rv = rv + self._read(n-len(rv))
+            data = self._read(n-len(rv))
+            if not data:
+                raise BinHexError('Premature EOF')
+            rv = rv + data
         self.dlen = self.dlen - n
         return rv
 
@@ -439,6 +545,8 @@ class HexBin:
             raise BinHexError('close_data at wrong time')
         if self.dlen:
             dummy = self._read(self.dlen)
+            if len(dummy) < self.dlen:
+                raise BinHexError('Premature EOF')
         self._checkcrc()
         self.state = _DID_DATA
 
@@ -453,7 +561,10 @@ class HexBin:
         else:
             n = self.rlen
         self.rlen = self.rlen - n
-        return self._read(n)
+        rv = self._read(n)
+        if len(rv) < n:
+            raise BinHexError('Premature EOF')
+        return rv
 
     def close(self):
         if self.state is None:
@@ -606,21 +717,15 @@ def uudecode(in_file, out_file=None, mode=None, quiet=False):
 
     try:
         #
-        # Read until a begin is encountered or we've exhausted the file
+        # Search the whole input for a begin line
         #
-        while True:
-            hdr = in_file.readline()
-            if not hdr:
-                raise UUDecodeError('No valid begin line found in input file')
-            if not hdr.startswith(b'begin'):
-                continue
-            hdrfields = hdr.split(b' ', 2)
-            if len(hdrfields) == 3 and hdrfields[0] == b'begin':
-                try:
-                    int(hdrfields[1], 8)
-                    break
-                except ValueError:
-                    pass
+        data = in_file.read()
+        hdr = find_uu_begin(data)
+        if hdr is None:
+            raise UUDecodeError('No valid begin line found in input file')
+        hdrfields = (b'begin', hdr.group(1), hdr.group(2))
+        in_file = io.BytesIO(data)
+        in_file.seek(hdr.end())
         if out_file is None:
             # If the filename isn't ASCII, what's up with that?!?
             out_file = hdrfields[2].rstrip(b' \t\r\n\f').decode("ascii")
@@ -671,6 +776,150 @@ def uudecode(in_file, out_file=None, mode=None, quiet=False):
 End uu source code.
 """
 
+_UU_BEGIN_RE = re.compile(rb"begin ([0-7]+) ([^\n]*)\n?")
+_UU_END_RE = re.compile(rb"^[ \t\r\f]*end[ \t\r\f]*$", re.MULTILINE)
+
+
+def find_uu_begin(data, pos=0):
+    """
+    Return a match for the first uuencode begin line at or after `pos`,
+    or None. bytes.find() looks for b"begin " at the start of a line,
+    so a "begin" in the middle of a line costs nothing,
+    and only those hits are confirmed with the regex.
+    """
+    while True:
+        if pos == 0 and data.startswith(b"begin "):
+            start = 0
+        else:
+            start = data.find(b"\nbegin ", max(pos - 1, 0)) + 1
+            if not start:
+                return None
+        match = _UU_BEGIN_RE.match(data, start)
+        if match:
+            return match
+        pos = start + 1
+
+
+def _uudecode_lines(body):
+    out = []
+    for line in body.split(b"\n")[:-1]:
+        try:
+            out.append(binascii.a2b_uu(line))
+        except binascii.Error:
+            # Same workaround for broken uuencoders as uudecode().
+            nbytes = (((line[0] - 32) & 63) * 4 + 5) // 3
+            out.append(binascii.a2b_uu(line[:nbytes]))
+    return b"".join(out)
+
+
+def _skip_segment(skipped, found, message):
+    """
+    Warn about a segment that could not be decoded,
+    or hold the warning back until another segment decodes.
+    """
+    skipped.append(message)
+    if found:
+        logging.warning(message)
+
+
+def _flush_skipped(skipped, found):
+    """Log the warnings held back before the first good segment."""
+    if found == 1:
+        for message in skipped:
+            logging.warning(message)
+
+
+def uudecode_segments(in_bytes):
+    """
+    Yield the decoded contents of each begin/end block in `in_bytes`,
+    e.g. the parts of a multi-part Usenet post.
+    Bad blocks are skipped with a warning;
+    UUDecodeError is raised only if no block decodes.
+    """
+    found = 0
+    skipped = []
+    pos = 0
+    while True:
+        hdr = find_uu_begin(in_bytes, pos)
+        if hdr is None:
+            break
+        end = _UU_END_RE.search(in_bytes, hdr.end())
+        if end is None:
+            _skip_segment(
+                skipped, found, "ignoring truncated uuencoded segment"
+            )
+            break
+        try:
+            data = _uudecode_lines(in_bytes[hdr.end() : end.start()])
+        except binascii.Error as e:
+            _skip_segment(
+                skipped, found, "ignoring bad uuencoded segment: {}".format(e)
+            )
+        else:
+            found += 1
+            _flush_skipped(skipped, found)
+            yield data
+        pos = end.end()
+    if not found:
+        if skipped:
+            raise UUDecodeError(skipped[0])
+        raise UUDecodeError("No valid begin line found in input file")
+
+
+def uudecode_bytes(in_bytes):
+    return b"".join(uudecode_segments(in_bytes))
+
+
+_BINHEX_MARKER = b"(This file must be converted with BinHex"
+
+
+def hexbin_segments(in_bytes):
+    """
+    Yield the data fork of each BinHex file in `in_bytes`.
+    The first one may start at any ':', as with hexbin();
+    later ones need the "(This file must be converted with BinHex" line
+    so that colons in e.g. mail headers between them are skipped.
+    Bad files are skipped with a warning;
+    BinHexError is raised only if none decodes.
+    """
+    found = 0
+    skipped = []
+    marker = in_bytes.find(_BINHEX_MARKER)
+    start = in_bytes.find(b":", max(marker, 0))
+    while start >= 0:
+        end = in_bytes.find(b":", start + 1)
+        end = len(in_bytes) if end < 0 else end + 1
+        try:
+            ifp = HexBin(io.BytesIO(in_bytes[start:end]))
+            data = ifp.read()
+            ifp.close_data()
+            ifp.close()
+        except (
+            BinHexError,
+            binascii.Error,
+            binascii.Incomplete,
+            struct.error,
+            TypeError,  # ord() of a missing header byte
+        ) as e:
+            _skip_segment(
+                skipped, found, "ignoring bad BinHex segment: {}".format(e)
+            )
+        else:
+            found += 1
+            _flush_skipped(skipped, found)
+            yield data
+        marker = in_bytes.find(_BINHEX_MARKER, end)
+        start = -1 if marker < 0 else in_bytes.find(b":", marker)
+    if not found:
+        if skipped:
+            raise BinHexError(skipped[0])
+        raise BinHexError("No binhex data found")
+
+
+def hexbin_bytes(in_bytes):
+    return b"".join(hexbin_segments(in_bytes))
+
+
 def wrap_uu(func):
     """
     Convert a function
@@ -736,18 +985,756 @@ def wrap_percent_encode(in_string):
     return urllib.parse.quote_from_bytes(in_string).encode()
 
 
+# base64.a85decode(), b85decode() and b32decode() are pure Python loops
+# over 5- and 8-character groups. With NumPy the radix conversion is done
+# on whole arrays instead. The fast paths only handle well-formed input:
+# anything else goes to the stdlib so that errors match it exactly.
+FAST_DECODE_MIN = 64
+_B85_ALPHABET = (
+    b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    b"abcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~"
+)
+_B32_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+# Decoded bytes in a Base32 quantum with this many padding characters.
+_B32_LEFTOVER = {0: 5, 1: 4, 3: 3, 4: 2, 6: 1}
+_A85_Y_GROUP = b"+<VdL"  # What "y" stands for: four spaces.
+
+
+def _reverse_table(alphabet):
+    table = numpy.full(256, 255, dtype=numpy.uint8)
+    table[numpy.frombuffer(alphabet, dtype=numpy.uint8)] = numpy.arange(
+        len(alphabet), dtype=numpy.uint8
+    )
+    return table
+
+
+if numpy is not None:
+    _B85_TABLE = _reverse_table(_B85_ALPHABET)
+    _B32_TABLE = _reverse_table(_B32_ALPHABET)
+    _A85_TABLE = _reverse_table(bytes(range(ord("!"), ord("u") + 1)))
+
+
+def _radix85_words(digits):
+    """Combine rows of five base-85 digits into big-endian 32-bit words."""
+    acc = numpy.zeros(len(digits), dtype=numpy.uint64)
+    for column in range(5):
+        acc *= 85
+        acc += digits[:, column]
+    if len(acc) and acc.max() > 0xFFFFFFFF:
+        return None
+    return acc.astype(">u4").tobytes()
+
+
+def fast_a85decode(
+    b, *, foldspaces=False, adobe=False, ignorechars=b" \t\n\r\v"
+):
+    """Like base64.a85decode(), with NumPy doing the arithmetic."""
+    slow = functools.partial(
+        base64.a85decode,
+        b,
+        foldspaces=foldspaces,
+        adobe=adobe,
+        ignorechars=ignorechars,
+    )
+    if numpy is None or not isinstance(b, bytes) or len(b) < FAST_DECODE_MIN:
+        return slow()
+    data = b
+    if adobe:
+        if not data.endswith(b"~>"):
+            return slow()
+        data = data[2:-2] if data.startswith(b"<~") else data[:-2]
+    # Digits and shortcuts take precedence over ignorechars.
+    shortcuts = b"zy" if foldspaces else b"z"
+    ignored = bytes(
+        c
+        for c in set(ignorechars)
+        if not ord("!") <= c <= ord("u") and c not in shortcuts
+    )
+    data = data.translate(None, ignored)
+    if b"z" in data or (foldspaces and b"y" in data):
+        # A shortcut is only allowed between 5-tuples,
+        # where it means the same as its 5-tuple spelled out.
+        array = numpy.frombuffer(data, dtype=numpy.uint8)
+        is_shortcut = array == ord("z")
+        if foldspaces:
+            is_shortcut |= array == ord("y")
+        digits_before = numpy.cumsum(~is_shortcut)[is_shortcut]
+        if numpy.any(digits_before % 5):
+            return slow()
+        data = data.replace(b"z", b"!!!!!")
+        if foldspaces:
+            data = data.replace(b"y", _A85_Y_GROUP)
+    digits = _A85_TABLE[numpy.frombuffer(data, dtype=numpy.uint8)]
+    if numpy.any(digits == 255):
+        return slow()
+    # A final partial group is padded with "u" and the extra bytes dropped.
+    padding = -len(digits) % 5
+    if padding:
+        digits = numpy.concatenate(
+            [digits, numpy.full(padding, 84, dtype=numpy.uint8)]
+        )
+    decoded = _radix85_words(digits.reshape(-1, 5))
+    if decoded is None:
+        return slow()
+    return decoded[: len(decoded) - padding]
+
+
+def fast_b85decode(b):
+    """Like base64.b85decode(), with NumPy doing the arithmetic."""
+    if numpy is None or not isinstance(b, bytes) or len(b) < FAST_DECODE_MIN:
+        return base64.b85decode(b)
+    digits = _B85_TABLE[numpy.frombuffer(b, dtype=numpy.uint8)]
+    if numpy.any(digits == 255):
+        return base64.b85decode(b)
+    padding = -len(digits) % 5
+    if padding:
+        digits = numpy.concatenate(
+            [digits, numpy.full(padding, 84, dtype=numpy.uint8)]
+        )
+    decoded = _radix85_words(digits.reshape(-1, 5))
+    if decoded is None:
+        return base64.b85decode(b)
+    return decoded[: len(decoded) - padding]
+
+
+def fast_b32decode(s):
+    """Like base64.b32decode(), with NumPy doing the arithmetic."""
+    if numpy is None or not isinstance(s, bytes) or len(s) < FAST_DECODE_MIN:
+        return base64.b32decode(s)
+    stripped = s.rstrip(b"=")
+    padchars = len(s) - len(stripped)
+    if len(s) % 8 or padchars not in _B32_LEFTOVER:
+        return base64.b32decode(s)
+    digits = _B32_TABLE[numpy.frombuffer(stripped, dtype=numpy.uint8)]
+    if numpy.any(digits == 255):
+        return base64.b32decode(s)
+    # Padding characters count as zero bits.
+    quanta = numpy.zeros((len(s) // 8, 8), dtype=numpy.uint64)
+    quanta.reshape(-1)[: len(digits)] = digits
+    acc = numpy.zeros(len(quanta), dtype=numpy.uint64)
+    for column in range(8):
+        acc <<= numpy.uint64(5)
+        acc |= quanta[:, column]
+    decoded = (acc << numpy.uint64(24)).astype(">u8").view(numpy.uint8)
+    decoded = decoded.reshape(-1, 8)[:, :5].tobytes()
+    return decoded[: len(decoded) - 5 + _B32_LEFTOVER[padchars]]
+
+
+# Block-aligned encodings can be decoded in independent pieces,
+# so huge inputs are split at quantum boundaries
+# and decoded by a process pool through shared memory.
+# Measured with benchmarks/parallel_decode.py on wrapped Base64,
+# the workers together take about 1.1 times as long as the serial stdlib
+# decoder, reading shared memory in place, and copying in and out of it
+# about 0.4 times, mostly faulting in the fresh pages,
+# so two workers barely break even and four are needed for a clear gain.
+PARALLEL_THRESHOLD = 16 * 1024 * 1024
+PARALLEL_CHUNK = 4 * 1024 * 1024
+PARALLEL_MIN_WORKERS = 4
+# Input whose start is not pure alphabet is left to the stdlib decoder
+# rather than first being copied into shared memory.
+PARALLEL_SAMPLE = 64 * 1024
+_WHITESPACE = b" \t\r\n\v\f"
+
+# encoding: (characters per quantum, bytes per quantum, alphabet,
+#            decoder, decoder for input that is known to be pure alphabet)
+_BLOCK_ENCODINGS = {
+    "Base64": (
+        4,
+        3,
+        _B64_ALPHABET,
+        base64.standard_b64decode,
+        binascii.a2b_base64,
+    ),
+    "Base32": (8, 5, _B32_ALPHABET, fast_b32decode, fast_b32decode),
+    "Base16": (2, 1, b"0123456789ABCDEF", base64.b16decode, binascii.a2b_hex),
+}
+
+_process_pool = None
+_process_pool_started = False
+_process_pool_lock = threading.Lock()
+_in_worker = False
+
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+
+
+def new_process_pool(workers=None):
+    """
+    Workers are started by a fork server (or spawned) rather than forked,
+    since a pool may be started from a thread of the asyncio or follow
+    executors, and they never start pools of their own.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return concurrent.futures.ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+    )
+
+
+def get_process_pool():
+    """Return the shared process pool, starting it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = new_process_pool()
+        atexit.register(discard_process_pool)
+    return _process_pool
+
+
+def start_process_pool():
+    """
+    Return the shared process pool, after making sure its fork server
+    and a worker are running.
+    The first job sent to a new pool starts them, in the sending thread,
+    which takes a good fraction of a second; asyncio programs can call this
+    before starting their event loop, or decode_all_async() does it
+    in a thread.
+    """
+    global _process_pool_started
+    with _process_pool_lock:
+        pool = get_process_pool()
+        if not _process_pool_started:
+            pool.submit(abs, 0).result()
+            _process_pool_started = True
+    return pool
+
+
+def discard_process_pool():
+    """Shut down the shared pool; the next call will start a new one."""
+    global _process_pool, _process_pool_started
+    if _process_pool is not None:
+        atexit.unregister(discard_process_pool)
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+        _process_pool_started = False
+
+
+# A regex, since it can search shared memory without copying it.
+_PADDING_RE = re.compile(rb"=")
+
+
+def _decode_piece(encoding, chunk, strip):
+    """
+    Decode a piece that is not the end of the input,
+    from any buffer, such as a view of shared memory.
+    """
+    chars, _, alphabet, _, raw_func = _BLOCK_ENCODINGS[encoding]
+    if encoding == "Base64" and strip:
+        # Like the stdlib decoder, skip everything outside the alphabet,
+        # so whitespace goes without copying the piece to strip it;
+        # binascii refuses a piece that ends inside a quantum.
+        if _PADDING_RE.search(chunk):
+            raise binascii.Error("Padding before end of input")
+        return binascii.a2b_base64(chunk)
+    if strip:
+        chunk = bytes(chunk).translate(None, _WHITESPACE)
+    if len(chunk) % chars:
+        raise binascii.Error("Piece is not a whole number of quanta")
+    if encoding == "Base64" and sys.version_info >= (3, 11):
+        # Strict mode rejects anything but alphabet and final padding
+        # in the same pass as decoding.
+        if chunk[-1] == ord("="):
+            raise binascii.Error("Padding before end of input")
+        return binascii.a2b_base64(chunk, strict_mode=True)
+    chunk = bytes(chunk)
+    if chunk.translate(None, alphabet):
+        raise binascii.Error("Non-alphabet character before end of input")
+    return raw_func(chunk)
+
+
+def _decode_last_piece(encoding, chunk, strip):
+    """Decode the end of the input like the stdlib decoder."""
+    if encoding == "Base64":
+        # What standard_b64decode() does, without first copying the piece.
+        return binascii.a2b_base64(chunk)
+    chunk = bytes(chunk)
+    if strip:
+        chunk = chunk.translate(None, _WHITESPACE)
+    return _BLOCK_ENCODINGS[encoding][3](chunk)
+
+
+def _decode_chunk(
+    encoding, in_name, out_name, in_start, in_end, out_start, final, strip
+):
+    """Decode one piece of shared memory into another; return its length."""
+    in_shm = multiprocessing.shared_memory.SharedMemory(name=in_name)
+    out_shm = multiprocessing.shared_memory.SharedMemory(name=out_name)
+    try:
+        with in_shm.buf[in_start:in_end] as view:
+            if final:
+                decoded = _decode_last_piece(encoding, view, strip)
+            else:
+                decoded = _decode_piece(encoding, view, strip)
+        with out_shm.buf[out_start : out_start + len(decoded)] as view:
+            view[:] = decoded
+        return len(decoded)
+    finally:
+        in_shm.close()
+        out_shm.close()
+
+
+def _split_pieces(in_bytes, chunk_size, at_newlines):
+    """
+    Cut `in_bytes` into (start, end) pieces of about `chunk_size`,
+    optionally just after a newline, leaving at least that much for the last.
+    """
+    length = len(in_bytes)
+    pieces = []
+    start = 0
+    while length - start >= 2 * chunk_size:
+        end = start + chunk_size
+        if at_newlines:
+            newline = in_bytes.find(b"\n", end, length - chunk_size)
+            if newline < 0:
+                newline = in_bytes.rfind(b"\n", start, end)
+            end = newline + 1 if newline >= 0 else end
+        pieces.append((start, end))
+        start = end
+    pieces.append((start, length))
+    return pieces
+
+
+def parallel_decode(
+    in_bytes, encoding, pool=None, chunk_size=None, ignore_whitespace=True
+):
+    """
+    Decode Base64, Base32 or Base16 `in_bytes` with a pool of processes,
+    by default the shared one from get_process_pool().
+    Padding and other end-of-input rules are left to the stdlib decoder
+    on the last piece; everything before it must be pure alphabet
+    (and whitespace, if ignored) in whole quanta.
+    Raises binascii.Error like the stdlib decoder on bad input,
+    and also on input it cannot split, such as irregular line lengths.
+    """
+    chars, size, _, _, _ = _BLOCK_ENCODINGS[encoding]
+    if chunk_size is None:
+        chunk_size = PARALLEL_CHUNK
+    chunk_size = max(chunk_size - chunk_size % chars, chars)
+    length = len(in_bytes)
+    # Counting the whitespace before each cut would cost as much as
+    # decoding, so wrapped input is cut after newlines instead and the
+    # workers check that each piece holds whole quanta.
+    # Each piece's output goes where it would be without any whitespace,
+    # which is never before where it really belongs.
+    pieces = _split_pieces(in_bytes, chunk_size, ignore_whitespace)
+    in_shm = multiprocessing.shared_memory.SharedMemory(
+        create=True, size=max(length, 1)
+    )
+    out_shm = multiprocessing.shared_memory.SharedMemory(
+        create=True, size=length // chars * size + size
+    )
+    try:
+        in_shm.buf[:length] = in_bytes
+        if pool is None:
+            pool = get_process_pool()
+        futures = [
+            pool.submit(
+                _decode_chunk,
+                encoding,
+                in_shm.name,
+                out_shm.name,
+                start,
+                end,
+                start // chars * size,
+                end == length,
+                ignore_whitespace,
+            )
+            for start, end in pieces
+        ]
+        try:
+            lengths = [future.result() for future in futures]
+        finally:
+            # Nothing may still be using the memory when it is unlinked.
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+        with out_shm.buf as out:
+            return b"".join(
+                out[start // chars * size :][:n]
+                for (start, _), n in zip(pieces, lengths)
+            )
+    finally:
+        in_shm.close()
+        in_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
+
+
+def wrap_parallel(encoding):
+    """
+    Use parallel_decode() for large inputs on machines with enough cores,
+    and the stdlib decoder otherwise or whenever the fast path gives up,
+    so that results and errors are always the stdlib's.
+    """
+    _, _, alphabet, func, _ = _BLOCK_ENCODINGS[encoding]
+    # Only the (non-validating) Base64 decoder skips whitespace.
+    ignore_whitespace = encoding == "Base64"
+
+    def new_func(in_bytes):
+        if (
+            len(in_bytes) < PARALLEL_THRESHOLD
+            or (os.cpu_count() or 1) < PARALLEL_MIN_WORKERS
+            or _in_worker
+        ):
+            return func(in_bytes)
+        sample = in_bytes[:PARALLEL_SAMPLE]
+        if ignore_whitespace:
+            sample = sample.translate(None, _WHITESPACE)
+        if sample.translate(None, alphabet):
+            return func(in_bytes)
+        try:
+            return parallel_decode(
+                in_bytes, encoding, ignore_whitespace=ignore_whitespace
+            )
+        except concurrent.futures.BrokenExecutor as e:
+            logging.warning("process pool failed: {}".format(e))
+            discard_process_pool()
+            return func(in_bytes)
+        except (binascii.Error, ValueError, OSError) as e:
+            logging.debug("parallel {} failed: {}".format(encoding, e))
+            return func(in_bytes)
+
+    return new_func
+
+
+# The escape-sequence families are found by one regex scan.
+# Every alternative starts with a literal lead byte, so the regex engine
+# can skip straight to the next '%', '=', '&' or '\',
+# and alternatives whose lead (e.g. b"%u") is not in the input
+# are left out of the pattern altogether.
+# The lead byte of a match tells which family it belongs to;
+# capturing groups would make every match slower.
+# SQL literals get a scan of their own: their leads '0', 'C' and 'c'
+# are hex digits, common inside the other escapes, and would stop
+# the skipping; a SQL literal can also start inside such an escape.
+# Entity names are limited to letters and digits;
+# html.unescape() only ever replaces such a prefix anyway.
+_SQL_ARGS = rb"""
+    \(\s*[0-9]+(?:\s*,\s*[0-9]+)*\s*\)
+    (?:\s*(?:\+|\|\|)\s*
+       (?:CHAR|CHR|char|chr)\(\s*[0-9]+(?:\s*,\s*[0-9]+)*\s*\))*
+"""
+# (name, family, leads, pattern), in order of precedence.
+_ESCAPE_BRANCHES = (
+    (
+        "js",
+        "js",
+        (b"%u",),
+        rb"""
+        %u(?:[dD][89abAB][0-9a-fA-F]{2}%u[dD][c-fC-F][0-9a-fA-F]{2}
+            |[0-9a-fA-F]{4})
+        """,
+    ),
+    ("percent", "percent", (b"%",), rb"%[0-9a-fA-F]{2}"),
+    ("qp", "qp", (b"=",), rb"=(?:[0-9a-fA-F]{2}|\r?\n)"),
+    (
+        "html",
+        "html",
+        (b"&",),
+        rb"&(?:\#[0-9]+;?|\#[xX][0-9a-fA-F]+;?|[A-Za-z0-9]{1,32};?)",
+    ),
+    (
+        "backslash",
+        "backslash",
+        (b"\\",),
+        rb"""
+        \\(?:x[0-9a-fA-F]{2}
+            |u[dD][89abAB][0-9a-fA-F]{2}\\u[dD][c-fC-F][0-9a-fA-F]{2}
+            |u[0-9a-fA-F]{4}
+            |U[0-9a-fA-F]{8}
+            |[0-7]{1,3}
+            |[abfnrtv\\'"])
+        """,
+    ),
+    # Hex literals of odd length are left alone by _unescape_sql().
+    ("sql_hex", "sql", (b"0x", b"0X"), rb"0[xX][0-9a-fA-F]+"),
+    ("sql_upper", "sql", (b"CHAR(", b"CHR("), rb"C(?:HAR|HR)" + _SQL_ARGS),
+    ("sql_lower", "sql", (b"char(", b"chr("), rb"c(?:har|hr)" + _SQL_ARGS),
+)
+ESCAPE_FAMILIES = ("qp", "percent", "html", "backslash", "js", "sql")
+_ESCAPE_LEAD_FAMILIES = {
+    ord("%"): "percent",  # or "js", after "%u"
+    ord("="): "qp",
+    ord("&"): "html",
+    ord("\\"): "backslash",
+    ord("0"): "sql",
+    ord("C"): "sql",
+    ord("c"): "sql",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _escape_regex(names):
+    """The scanning regex for the alternatives in `names`."""
+    return re.compile(
+        b"|".join(
+            pattern for name, _, _, pattern in _ESCAPE_BRANCHES if name in names
+        ),
+        re.VERBOSE,
+    )
+
+
+def _escape_family(escape):
+    family = _ESCAPE_LEAD_FAMILIES[escape[0]]
+    if family == "percent" and escape[1:2] == b"u":
+        return "js"
+    return family
+
+
+_BACKSLASH_ESCAPES = {
+    b"a": b"\a",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"v": b"\v",
+    b"\\": b"\\",
+    b"'": b"'",
+    b'"': b'"',
+}
+
+
+def _utf16_to_utf8(code_units):
+    """Decode one or two hex UTF-16 code units (a surrogate pair) to UTF-8."""
+    units = [int(unit, 16) for unit in code_units]
+    if len(units) == 2:
+        code_point = 0x10000 + ((units[0] - 0xD800) << 10) + units[1] - 0xDC00
+    else:
+        code_point = units[0]
+    return chr(code_point).encode("utf-8", "surrogatepass")
+
+
+def _unescape_js(escape):
+    return _utf16_to_utf8(escape.split(b"%u")[1:])
+
+
+def _unescape_percent(escape):
+    return bytes([int(escape[1:], 16)])
+
+
+def _unescape_html(escape):
+    return html.unescape(escape.decode("ascii")).encode()
+
+
+def _unescape_backslash(escape):
+    kind = escape[1:2]
+    if kind == b"x":
+        return bytes([int(escape[2:], 16)])
+    if kind == b"u":
+        return _utf16_to_utf8(escape.split(b"\\u")[1:])
+    if kind == b"U":
+        code_point = int(escape[2:], 16)
+        if code_point > sys.maxunicode:
+            return escape
+        return chr(code_point).encode("utf-8", "surrogatepass")
+    if kind.isdigit():
+        value = int(escape[1:], 8)
+        return bytes([value]) if value < 256 else escape
+    return _BACKSLASH_ESCAPES[kind]
+
+
+def _unescape_qp(escape):
+    # Only used to report what scan_escapes() found;
+    # quoted-printable is decoded by the C binascii.a2b_qp().
+    if escape[1:2] in (b"\r", b"\n"):
+        return b""
+    return bytes([int(escape[1:], 16)])
+
+
+def _unescape_sql(escape):
+    if escape[:2] in (b"0x", b"0X"):
+        if len(escape) % 2:
+            return escape
+        return bytes.fromhex(escape[2:].decode("ascii"))
+    out = []
+    for number in re.findall(rb"[0-9]+", escape):
+        # int() refuses very long digit strings; none is a character anyway.
+        digits = number.lstrip(b"0") or b"0"
+        if len(digits) > 7 or int(digits) > sys.maxunicode:
+            return escape
+        value = int(digits)
+        if value < 256:
+            out.append(bytes([value]))
+        else:
+            out.append(chr(value).encode("utf-8", "surrogatepass"))
+    return b"".join(out)
+
+
+_UNESCAPE_FUNCS = {
+    "js": _unescape_js,
+    "percent": _unescape_percent,
+    "qp": _unescape_qp,
+    "html": _unescape_html,
+    "backslash": _unescape_backslash,
+    "sql": _unescape_sql,
+}
+
+
+def _escape_branches(in_bytes, families):
+    """
+    The names of the alternatives of `families` whose leads occur in
+    `in_bytes`, and the families they belong to.
+    """
+    names = []
+    present = set()
+    for name, family, leads, _ in _ESCAPE_BRANCHES:
+        if family in families and any(lead in in_bytes for lead in leads):
+            names.append(name)
+            present.add(family)
+    return tuple(names), present
+
+
+def _unescaper(family):
+    """
+    Return a function decoding one escape of `family` from its match.
+    The same few escapes tend to recur, so each is decoded once.
+    """
+    func = _UNESCAPE_FUNCS[family]
+    decoded = {}
+
+    def unescape(match):
+        escape = match.group()
+        try:
+            return decoded[escape]
+        except KeyError:
+            decoded[escape] = func(escape)
+            return decoded[escape]
+
+    return unescape
+
+
+def _scan(in_bytes, names):
+    """scan_escapes() for the alternatives in `names`."""
+    found = collections.OrderedDict()
+    # The same few escapes tend to recur, so each is decoded once.
+    decoded = {}
+    for match in _escape_regex(names).finditer(in_bytes):
+        escape = match.group()
+        try:
+            family, out = decoded[escape]
+        except KeyError:
+            family = _escape_family(escape)
+            out = _UNESCAPE_FUNCS[family](escape)
+            decoded[escape] = family, out
+            if family not in found:
+                found[family] = []
+        start, end = match.span()
+        found[family].append((start, end, out))
+    return found
+
+
+def scan_escapes(in_bytes, families=ESCAPE_FAMILIES):
+    """
+    Find and decode the escape sequences of `families`:
+    all but SQL literals in one regex scan, and those in another.
+    Return an OrderedDict mapping each family found
+    to a list of (start, end, decoded_bytes).
+    Each family's matches are the ones its decoder finds on its own.
+    """
+    found = collections.OrderedDict()
+    for scanned in (
+        [family for family in families if family != "sql"],
+        [family for family in families if family == "sql"],
+    ):
+        names, _ = _escape_branches(in_bytes, scanned)
+        if names:
+            found.update(_scan(in_bytes, names))
+    return found
+
+
+def _splice(in_bytes, matches):
+    pieces = []
+    last = 0
+    for start, end, decoded in matches:
+        pieces.append(in_bytes[last:start])
+        pieces.append(decoded)
+        last = end
+    pieces.append(in_bytes[last:])
+    return b"".join(pieces)
+
+
+def decode_escape_families(in_bytes, families=ESCAPE_FAMILIES):
+    """
+    Return an OrderedDict mapping each of `families` to `in_bytes`
+    with only that family's escapes decoded, as scan_escapes() finds them.
+    Quoted-printable is left to the much faster C binascii.a2b_qp().
+    """
+    outputs = collections.OrderedDict((family, in_bytes) for family in families)
+    if "qp" in outputs:
+        outputs["qp"] = quopri.decodestring(in_bytes)
+    for scanned in (
+        [family for family in families if family not in ("qp", "sql")],
+        [family for family in families if family == "sql"],
+    ):
+        names, present = _escape_branches(in_bytes, scanned)
+        if len(present) == 1:
+            # With a single family, re.sub() can put the output together in C.
+            (family,) = present
+            regex = _escape_regex(names)
+            outputs[family] = regex.sub(_unescaper(family), in_bytes)
+        elif present:
+            for family, matches in _scan(in_bytes, names).items():
+                outputs[family] = _splice(in_bytes, matches)
+    return outputs
+
+
+def decode_escapes(in_bytes, family):
+    """Decode only the escapes of one family, leaving the rest as is."""
+    return decode_escape_families(in_bytes, (family,))[family]
+
+
+def wrap_escapes(family):
+    def new_func(in_bytes):
+        return decode_escapes(in_bytes, family)
+
+    # Lets decode_all() decode all the escape families from one scan.
+    new_func.escape_family = family
+    return new_func
+
+
+def backslash_encode(in_bytes):
+    if not in_bytes:
+        return b""
+    # Hex digits never contain an 'x', so it can mark where each escape goes.
+    return b"\\x" + binascii.hexlify(in_bytes, b"x").replace(b"x", b"\\x")
+
+
+def _utf16_escape(utf16):
+    if not utf16:
+        return b""
+    escaped = binascii.hexlify(utf16, b"x", 2).upper()
+    return b"%u" + escaped.replace(b"X", b"%u")
+
+
+def js_escape(in_bytes):
+    # Like JavaScript's deprecated escape(), but for every character.
+    return _utf16_escape(in_bytes.decode().encode("utf-16-be"))
+
+
+def sql_hex_encode(in_bytes):
+    return b"0x" + binascii.hexlify(in_bytes).upper()
+
+
 decode_string_funcs = collections.OrderedDict()
-decode_string_funcs["Base64"] = base64.standard_b64decode
-decode_string_funcs["Base32"] = base64.b32decode
-decode_string_funcs["Base16"] = base64.b16decode
-decode_string_funcs["Ascii85"] = base64.a85decode
-decode_string_funcs["Base85"] = base64.b85decode
-decode_string_funcs["Uuencoding"] = wrap_uu(uudecode)
-decode_string_funcs["BinHex"] = wrap_binhex(hexbin)
+decode_string_funcs["Base64"] = wrap_parallel("Base64")
+decode_string_funcs["Base32"] = wrap_parallel("Base32")
+decode_string_funcs["Base16"] = wrap_parallel("Base16")
+decode_string_funcs["Ascii85"] = fast_a85decode
+decode_string_funcs["Base85"] = fast_b85decode
+decode_string_funcs["Uuencoding"] = uudecode_bytes
+decode_string_funcs["BinHex"] = hexbin_bytes
 decode_string_funcs["ROT13"] = wrap_rot13(codecs.decode)
-decode_string_funcs["MIME quoted-printable"] = quopri.decodestring
-decode_string_funcs["Percent-encoding"] = urllib.parse.unquote_to_bytes
-decode_string_funcs["HTML"] = wrap_html(html.unescape)
+decode_string_funcs["MIME quoted-printable"] = wrap_escapes("qp")
+decode_string_funcs["Percent-encoding"] = wrap_escapes("percent")
+decode_string_funcs["HTML"] = wrap_escapes("html")
+decode_string_funcs["Backslash escapes"] = wrap_escapes("backslash")
+decode_string_funcs["JavaScript %u-encoding"] = wrap_escapes("js")
+decode_string_funcs["SQL literals"] = wrap_escapes("sql")
 
 encode_string_funcs = collections.OrderedDict()
 encode_string_funcs["Base64"] = base64.standard_b64encode
@@ -761,6 +1748,244 @@ encode_string_funcs["ROT13"] = wrap_rot13(codecs.encode)
 encode_string_funcs["MIME quoted-printable"] = quopri.encodestring
 encode_string_funcs["Percent-encoding"] = wrap_percent_encode
 encode_string_funcs["HTML"] = wrap_html(html.escape)
+encode_string_funcs["Backslash escapes"] = backslash_encode
+encode_string_funcs["JavaScript %u-encoding"] = js_escape
+encode_string_funcs["SQL literals"] = sql_hex_encode
+
+# Streaming versions of encode_string_funcs, for --reverse.
+# Each takes a binary file and a read size and yields output pieces,
+# so neither the whole input nor the whole output is held in memory.
+ENCODE_CHUNK = 1024 * 1024
+WRAP_COLUMNS = 76
+
+
+def _read_chunks(infile, chunk_size, multiple=1):
+    """
+    Yield pieces of `infile` whose lengths are multiples of `multiple`,
+    except possibly the last one.
+    """
+    chunk_size = max(chunk_size - chunk_size % multiple, multiple)
+    leftover = b""
+    while True:
+        data = infile.read(chunk_size)
+        if not data:
+            break
+        if leftover:
+            data = leftover + data
+        cut = len(data) - len(data) % multiple
+        leftover = data[cut:]
+        if cut:
+            yield data[:cut]
+    if leftover:
+        yield leftover
+
+
+def _wrap_lines(pieces, width):
+    """Break a stream of pieces into newline-terminated lines of `width`."""
+    pending = b""
+    for piece in pieces:
+        if pending:
+            piece = pending + piece
+        cut = len(piece) - len(piece) % width
+        if cut:
+            lines = [piece[i : i + width] for i in range(0, cut, width)]
+            lines.append(b"")
+            yield b"\n".join(lines)
+        pending = piece[cut:]
+    if pending:
+        yield pending + b"\n"
+
+
+def stream_chunks(func, multiple=1):
+    """
+    Convert a function
+        out_bytes = f(in_bytes)
+    that can encode any run of `multiple`-byte groups on its own
+    to a streaming encoder.
+    """
+
+    def new_func(infile, chunk_size):
+        for chunk in _read_chunks(infile, chunk_size, multiple):
+            yield func(chunk)
+
+    return new_func
+
+
+def stream_uu(infile, chunk_size):
+    # Same output as uuencode() with its default name and mode.
+    yield b"begin 666 -\n"
+    for chunk in _read_chunks(infile, chunk_size, 45):
+        yield b"".join(
+            binascii.b2a_uu(chunk[i : i + 45]) for i in range(0, len(chunk), 45)
+        )
+    yield b" \nend\n"
+
+
+class _Collector:
+    """A file-like object that keeps what is written to it until drained."""
+
+    def __init__(self):
+        self.pieces = []
+
+    def write(self, data):
+        self.pieces.append(data)
+
+    def close(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def stream_binhex(infile, chunk_size):
+    # The header holds the data length, so input of unknown size
+    # (e.g. a pipe) is first spooled to a temporary file.
+    try:
+        length = os.fstat(infile.fileno()).st_size - infile.tell()
+        if length < 0:
+            raise OSError("not a regular file")
+        spool = None
+    except (OSError, AttributeError, io.UnsupportedOperation):
+        spool = tempfile.TemporaryFile()
+        for chunk in _read_chunks(infile, chunk_size):
+            spool.write(chunk)
+        length = spool.tell()
+        spool.seek(0)
+        infile = spool
+    try:
+        out = _Collector()
+        ofp = BinHex(("-", FInfo(), length, 0), out)
+        yield out.drain()
+        for chunk in _read_chunks(infile, chunk_size):
+            ofp.write(chunk)
+            yield out.drain()
+        ofp.close()
+        yield out.drain()
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+_ROT13_TABLE = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
+    b"NOPQRSTUVWXYZABCDEFGHIJKLMnopqrstuvwxyzabcdefghijklm",
+)
+
+
+def stream_qp(infile, chunk_size):
+    # binascii.b2a_qp() counts line lengths, so it is fed whole lines.
+    # A line longer than a chunk is split with a soft line break.
+    # b2a_qp() also writes every line break as CRLF or LF depending on
+    # the first one in its input. To match quopri.encodestring(), the first
+    # line is held until its ending is known (up to ENCODE_CHUNK bytes),
+    # and each piece is encoded after an empty line with that ending,
+    # which is then dropped.
+    ending = None
+    pending = bytearray()
+
+    def encode(data):
+        lead = ending or b"\n"
+        return binascii.b2a_qp(lead + data)[len(lead) :]
+
+    for chunk in _read_chunks(infile, chunk_size):
+        newline = chunk.rfind(b"\n") + 1
+        if ending is None and newline:
+            first = chunk.find(b"\n")
+            before = chunk[first - 1 : first] if first else pending[-1:]
+            ending = b"\r\n" if before == b"\r" else b"\n"
+        pending += chunk
+        if newline:
+            newline += len(pending) - len(chunk)
+            yield encode(pending[:newline])
+            del pending[:newline]
+            continue
+        # Keep a trailing CR in case the next chunk starts with LF.
+        split = len(pending) - pending.endswith(b"\r")
+        if split >= (chunk_size if ending else max(chunk_size, ENCODE_CHUNK)):
+            out = encode(pending[:split])
+            soft_break = b"=" + (ending or b"\n")
+            # b2a_qp() lets the last line use all 76 characters,
+            # so move its last character or escape past a soft break.
+            if len(out) - out.rfind(b"\n") > 76:
+                cut = len(out) - (3 if out[-3:-2] == b"=" else 1)
+                out = out[:cut] + soft_break + out[cut:]
+            yield out + soft_break
+            del pending[:split]
+    if pending:
+        yield encode(pending)
+
+
+def html_escape_bytes(in_bytes):
+    # html.escape() only touches ASCII, so this works without decoding.
+    return (
+        in_bytes.replace(b"&", b"&amp;")
+        .replace(b"<", b"&lt;")
+        .replace(b">", b"&gt;")
+        .replace(b'"', b"&quot;")
+        .replace(b"'", b"&#x27;")
+    )
+
+
+def stream_js(infile, chunk_size):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in _read_chunks(infile, chunk_size):
+        yield _utf16_escape(decoder.decode(chunk).encode("utf-16-be"))
+    yield _utf16_escape(decoder.decode(b"", final=True).encode("utf-16-be"))
+
+
+def stream_sql(infile, chunk_size):
+    yield b"0x"
+    for chunk in _read_chunks(infile, chunk_size):
+        yield binascii.hexlify(chunk).upper()
+
+
+stream_encode_funcs = collections.OrderedDict()
+stream_encode_funcs["Base64"] = stream_chunks(
+    functools.partial(binascii.b2a_base64, newline=False), 3
+)
+stream_encode_funcs["Base32"] = stream_chunks(base64.b32encode, 5)
+stream_encode_funcs["Base16"] = stream_chunks(base64.b16encode)
+stream_encode_funcs["Ascii85"] = stream_chunks(base64.a85encode, 4)
+stream_encode_funcs["Base85"] = stream_chunks(base64.b85encode, 4)
+stream_encode_funcs["Uuencoding"] = stream_uu
+stream_encode_funcs["BinHex"] = stream_binhex
+stream_encode_funcs["ROT13"] = stream_chunks(
+    lambda chunk: chunk.translate(_ROT13_TABLE)
+)
+stream_encode_funcs["MIME quoted-printable"] = stream_qp
+stream_encode_funcs["Percent-encoding"] = stream_chunks(wrap_percent_encode)
+stream_encode_funcs["HTML"] = stream_chunks(html_escape_bytes)
+stream_encode_funcs["Backslash escapes"] = stream_chunks(backslash_encode)
+stream_encode_funcs["JavaScript %u-encoding"] = stream_js
+stream_encode_funcs["SQL literals"] = stream_sql
+
+# Encodings whose output is one long line unless it is wrapped.
+WRAPPED_ENCODINGS = ("Base64", "Base32", "Base16", "Ascii85", "Base85")
+
+
+def encode_stream(
+    encoding,
+    infile,
+    outfile,
+    wrap=WRAP_COLUMNS,
+    chunk_size=ENCODE_CHUNK,
+):
+    """
+    Encode binary file `infile` into binary file `outfile` a chunk at a time.
+    Base64 and friends are wrapped at `wrap` columns unless it is 0,
+    like coreutils base64.
+    """
+    if wrap < 0:
+        raise ValueError("wrap must not be negative, not {}".format(wrap))
+    pieces = stream_encode_funcs[encoding](infile, chunk_size)
+    if wrap and encoding in WRAPPED_ENCODINGS:
+        pieces = _wrap_lines(pieces, wrap)
+    for piece in pieces:
+        if piece:
+            outfile.write(piece)
+    outfile.flush()
 
 
 def decode_bytes(unknown_bytes, func, encoding):
@@ -784,17 +2009,218 @@ def decode_bytes(unknown_bytes, func, encoding):
     return decoded_bytes
 
 
-# TODO: make this just decode and return a dict
-# instead of also printing the output
-# to facilitate testing.
-def decode_and_print(unknown_bytes):
-    if unknown_bytes == b"":
-        logging.error("no input to decode")
+def decode_all(unknown_bytes, names=None):
+    """
+    Try each decoder (or just the ones in `names`)
+    and return an OrderedDict mapping encoding name to decoded bytes,
+    or to None if decoding failed.
+    """
+    if names is None:
+        names = decode_string_funcs.keys()
+    escaped = decode_escape_names(unknown_bytes, names)
+    results = collections.OrderedDict()
+    for name in names:
+        if name in escaped:
+            results[name] = escaped[name]
+            continue
+        func = decode_string_funcs[name]
+        results[name] = decode_bytes(unknown_bytes, func, name)
+    return results
+
+
+def decode_escape_names(unknown_bytes, names):
+    """
+    Decode the escape encodings among `names` together,
+    from one scan of the input.
+    Return a dict mapping those encoding names to decoded bytes,
+    or an empty dict if there are fewer than two of them
+    or the scan fails, so that each is tried on its own instead.
+    """
+    families = collections.OrderedDict()
+    for name in names:
+        family = getattr(decode_string_funcs[name], "escape_family", None)
+        if family is not None:
+            families[name] = family
+    if len(families) < 2:
+        return {}
+    try:
+        outputs = decode_escape_families(unknown_bytes, families.values())
+    except ValueError:
+        return {}
+    return {name: outputs[family] for name, family in families.items()}
+
+
+# Decoded output is often compressed; only a prefix is inflated by default,
+# and never more than DECOMPRESS_LIMIT bytes, to survive decompression bombs.
+DECOMPRESS_PREFIX = 64 * 1024
+DECOMPRESS_LIMIT = 64 * 1024 * 1024
+_DECOMPRESS_CHUNK = 64 * 1024
+_DECOMPRESS_ERRORS = (
+    zlib.error,
+    OSError,  # from bz2
+    EOFError,
+    zipfile.BadZipFile,
+    NotImplementedError,  # zip version too new
+    ValueError,  # corrupt zip offsets, e.g. "negative seek value"
+    struct.error,  # truncated zip headers
+)
+if lzma is not None:
+    _DECOMPRESS_ERRORS += (lzma.LZMAError,)
+
+
+def detect_compression(data):
+    """Return the name of the compression format of `data`, or None."""
+    if data.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if data.startswith(b"BZh") and data[3:4].isdigit():
+        return "bzip2"
+    if data.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if data.startswith(b"PK\x03\x04"):
+        return "zip"
+    if (
+        len(data) >= 2
+        and data[0] & 0x0F == 8  # deflate
+        and data[0] >> 4 <= 7  # window size
+        and not data[1] & 0x20  # no preset dictionary
+        and (data[0] * 256 + data[1]) % 31 == 0
+    ):
+        return "zlib"
+    return None
+
+
+def _stream_decompress(decompressor, data, limit):
+    """
+    Feed `data` to a zlib, bz2 or lzma decompressor object in chunks,
+    stopping once `limit` bytes have come out.
+    Return (output, complete).
+    """
+    out = []
+    total = 0
+    view = memoryview(data)
+    for i in range(0, len(data), _DECOMPRESS_CHUNK):
+        chunk = view[i : i + _DECOMPRESS_CHUNK]
+        while total < limit:
+            piece = decompressor.decompress(chunk, limit - total)
+            out.append(piece)
+            total += len(piece)
+            if decompressor.eof:
+                return b"".join(out), True
+            # zlib hands back the input it did not get to,
+            # bz2 and lzma keep it and need to be called again.
+            chunk = getattr(decompressor, "unconsumed_tail", b"")
+            if not chunk and getattr(decompressor, "needs_input", True):
+                break
+        if total >= limit:
+            break
+    return b"".join(out), False
+
+
+def _zip_member(data):
+    """
+    Return (decompressor, compressed bytes) for the first file in a zip
+    archive, with decompressor None if the file is stored.
+    Return None if there is no file, or it is encrypted
+    or compressed with something other than deflate or bzip2.
+    zipfile.ZipExtFile cannot be used here:
+    it inflates bzip2 and lzma members without any output limit.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = [i for i in archive.infolist() if not i.is_dir()]
+    if not members:
+        return None
+    info = members[0]
+    if info.flag_bits & 0x1:  # encrypted
+        return None
+    if info.compress_type == zipfile.ZIP_STORED:
+        decompressor = None
+    elif info.compress_type == zipfile.ZIP_DEFLATED:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    elif info.compress_type == zipfile.ZIP_BZIP2:
+        decompressor = bz2.BZ2Decompressor()
+    else:
+        return None
+    # The local file header repeats the name and has its own extra field.
+    start = info.header_offset
+    header = data[start : start + 30]
+    if len(header) < 30 or not header.startswith(b"PK\x03\x04"):
+        raise zipfile.BadZipFile("bad local file header")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    start += 30 + name_length + extra_length
+    return decompressor, data[start : start + info.compress_size]
+
+
+def decompress(data, limit=DECOMPRESS_PREFIX):
+    """
+    If `data` is compressed, return (format, output, complete),
+    where output is at most `limit` bytes. Otherwise return None.
+    """
+    kind = detect_compression(data)
+    try:
+        if kind == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif kind == "zlib":
+            decompressor = zlib.decompressobj()
+        elif kind == "bzip2":
+            decompressor = bz2.BZ2Decompressor()
+        elif kind == "xz" and lzma is not None:
+            decompressor = lzma.LZMADecompressor()
+        elif kind == "zip":
+            found = _zip_member(data)
+            if found is None:
+                return None
+            decompressor, data = found
+        else:
+            return None
+        if decompressor is None:  # a stored zip member
+            out, complete = data[:limit], len(data) <= limit
+        else:
+            out, complete = _stream_decompress(decompressor, data, limit)
+    except _DECOMPRESS_ERRORS as e:
+        logging.debug("{} decompression failed: {}".format(kind, e))
+        return None
+    if not out:
+        return None
+    return kind, out, complete
+
+
+def add_decompressed(unknown_bytes, results, limit=DECOMPRESS_PREFIX):
+    """
+    Return a copy of the output of decode_all()
+    with the decompressed form of any compressed output
+    added right after it, as e.g. "Base64 -> gzip".
+    Compressed input is decompressed once, as e.g. "Input -> gzip",
+    rather than once for every encoding that left it unchanged.
+    """
+    chained = collections.OrderedDict()
+
+    def add(name, decoded_bytes):
+        found = decompress(decoded_bytes, limit)
+        if found is None:
+            return
+        kind, out, complete = found
+        label = "{} -> {}".format(name, kind)
+        if not complete:
+            label += " (first {} bytes)".format(len(out))
+        chained[label] = out
+
+    add("Input", unknown_bytes)
+    for name, decoded_bytes in results.items():
+        chained[name] = decoded_bytes
+        if decoded_bytes and decoded_bytes != unknown_bytes:
+            add(name, decoded_bytes)
+    return chained
+
+
+def summarize(unknown_bytes, results):
+    """
+    Sort the output of decode_all() into
+    printable output, failed encodings, and encodings that did nothing.
+    """
     failed_encodings = []
     no_difference = []
     output_dict = collections.OrderedDict()
-    for name, func in decode_string_funcs.items():
-        decoded_bytes = decode_bytes(unknown_bytes, func, name)
+    for name, decoded_bytes in results.items():
         if decoded_bytes:
             if decoded_bytes == unknown_bytes:
                 no_difference.append(name)
@@ -806,12 +2232,979 @@ def decode_and_print(unknown_bytes):
                     output_dict[name] = repr(decoded_bytes)
         else:
             failed_encodings.append(name)
+    return output_dict, failed_encodings, no_difference
+
+
+def print_summary(
+    output_dict, failed_encodings, no_difference, skipped=(), file=None
+):
     if output_dict:
         column_chars = max([len(name) for name in output_dict.keys()])
         for name, output in output_dict.items():
-            print("{} : {}".format(name.ljust(column_chars), output))
-    print("Failed to decode:", ", ".join(failed_encodings))
-    print("Output same as input:", ", ".join(no_difference))
+            print("{} : {}".format(name.ljust(column_chars), output), file=file)
+    print("Failed to decode:", ", ".join(failed_encodings), file=file)
+    print("Output same as input:", ", ".join(no_difference), file=file)
+    if skipped:
+        print("Not tried:", ", ".join(skipped), file=file)
+
+
+def decode_and_print(
+    unknown_bytes,
+    stats=None,
+    threshold=None,
+    names=None,
+    decompress_limit=DECOMPRESS_PREFIX,
+):
+    if unknown_bytes == b"":
+        logging.error("no input to decode")
+    if stats is None:
+        results = decode_all(unknown_bytes, names)
+    else:
+        results = decode_scheduled(unknown_bytes, stats, threshold, names)
+    skipped = [name for name in decode_string_funcs if name not in results]
+    results = add_decompressed(unknown_bytes, results, decompress_limit)
+    print_summary(*summarize(unknown_bytes, results), skipped=skipped)
+
+
+# Scoring looks at a bounded prefix so that it stays cheap
+# next to the decoders it is used to schedule.
+SCORE_SAMPLE = 64 * 1024
+_ASCII_PRINTABLE = bytes(range(0x20, 0x7F))
+# The ASCII characters that str.isprintable() or str.isspace() accept.
+_ASCII_TEXT = _ASCII_PRINTABLE + b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f"
+_NON_ASCII = bytes(range(0x80, 0x100))
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+def _is_utf8(sample, truncated):
+    try:
+        sample.decode()
+    except UnicodeDecodeError as e:
+        # A truncated sample may end in the middle of a character.
+        return truncated and e.reason == "unexpected end of data"
+    return True
+
+
+# Undoing a binary-to-text encoding leaves at most about this share
+# of the input. BinHex is missing because its run-length coding can expand.
+_DECODED_RATIO = {
+    "Base64": 3 / 4,
+    "Base32": 5 / 8,
+    "Base16": 1 / 2,
+    "Ascii85": 4 / 5,
+    "Base85": 4 / 5,
+    "Uuencoding": 3 / 4,
+}
+# The escape decoders have to remove at least this share of the input,
+# so that e.g. quoted-printable dropping the "=" at the end of Base64
+# does not count as a confident decoding.
+MIN_ESCAPE_SHRINK = 0.01
+_ESCAPE_ENCODINGS = (
+    "MIME quoted-printable",
+    "Percent-encoding",
+    "HTML",
+    "Backslash escapes",
+    "JavaScript %u-encoding",
+    "SQL literals",
+)
+
+
+def _transformed(unknown_bytes, decoded_bytes, encoding):
+    """
+    Whether decoder `encoding` changed a real share of the input,
+    rather than e.g. only trimming a byte or two.
+    """
+    if encoding in _DECODED_RATIO:
+        # A few bytes of slack for padding and partial groups.
+        limit = _DECODED_RATIO[encoding] * len(unknown_bytes) + 4
+        return len(decoded_bytes) <= limit
+    if encoding in _ESCAPE_ENCODINGS:
+        removed = len(unknown_bytes) - len(decoded_bytes)
+        return removed >= max(2, MIN_ESCAPE_SHRINK * len(unknown_bytes))
+    return True
+
+
+def score_decoding(unknown_bytes, decoded_bytes, encoding=None):
+    """
+    Return a confidence between 0 and 1 that `decoded_bytes`
+    is the intended decoding of `unknown_bytes`,
+    judging by the share of printable text in its first SCORE_SAMPLE bytes.
+    If the name of the decoder is given, output that it barely changed
+    scores at most half.
+    """
+    if not decoded_bytes or decoded_bytes == unknown_bytes:
+        return 0.0
+    sample = decoded_bytes[:SCORE_SAMPLE]
+    if _is_utf8(sample, len(decoded_bytes) > len(sample)):
+        # Characters are counted by their first byte,
+        # and all non-ASCII ones count as printable.
+        continuation = len(sample) - len(
+            sample.translate(None, _UTF8_CONTINUATION)
+        )
+        chars = len(sample) - continuation
+        control = len(sample.translate(None, _ASCII_TEXT + _NON_ASCII))
+    else:
+        chars = len(sample)
+        control = len(sample.translate(None, _ASCII_PRINTABLE))
+    score = (chars - control) / chars
+    # Undoing a binary-to-text encoding makes the data shorter.
+    # ROT13 is the exception: it turns any ASCII into printable ASCII,
+    # so a same-length result is never confident on its own.
+    if len(decoded_bytes) >= len(unknown_bytes):
+        score = score / 2
+    elif encoding is not None and not _transformed(
+        unknown_bytes, decoded_bytes, encoding
+    ):
+        score = score / 2
+    return score
+
+
+# Rough per-byte costs used until a decoder has been timed on this machine.
+DEFAULT_SECONDS_PER_BYTE = {
+    "Base64": 1e-9,
+    "Base32": 3e-8,
+    "Base16": 2e-9,
+    "Ascii85": 1e-7,
+    "Base85": 1e-7,
+    "Uuencoding": 2e-8,
+    "BinHex": 2e-7,
+    "ROT13": 5e-9,
+    "MIME quoted-printable": 5e-9,
+    "Percent-encoding": 1e-8,
+    "HTML": 2e-8,
+    "Backslash escapes": 1e-8,
+    "JavaScript %u-encoding": 1e-8,
+    "SQL literals": 1e-8,
+}
+DEFAULT_SECONDS_PER_CALL = 1e-5
+DEFAULT_CONFIDENCE = 0.95
+
+
+def default_cost_file():
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_dir, "try_decodings", "costs.json")
+
+
+class DecoderStats:
+    """
+    Per-decoder timings (bucketed by input size)
+    and counts of confident results,
+    used to schedule the cheapest likely decoders first.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.decoders = {}
+        if path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                decoders = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning("ignoring cost file '{}': {}".format(self.path, e))
+            return
+        if not self._valid(decoders):
+            logging.warning(
+                "ignoring cost file '{}': not a table of decoder costs".format(
+                    self.path
+                )
+            )
+            return
+        self.decoders = decoders
+
+    @staticmethod
+    def _valid(decoders):
+        """Whether `decoders` has the shape that save() writes."""
+        if not isinstance(decoders, dict):
+            return False
+        for entry in decoders.values():
+            if not isinstance(entry, dict):
+                return False
+            attempts = entry.get("attempts")
+            successes = entry.get("successes")
+            timings = entry.get("seconds")
+            if not (
+                isinstance(attempts, int)
+                and isinstance(successes, int)
+                and isinstance(timings, dict)
+            ):
+                return False
+            for bucket, seconds in timings.items():
+                if not bucket.isdigit():
+                    return False
+                if not isinstance(seconds, (int, float)):
+                    return False
+        return True
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path) or os.curdir
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=directory, delete=False
+            ) as f:
+                json.dump(self.decoders, f, indent=1, sort_keys=True)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            logging.warning(
+                "could not save cost file '{}': {}".format(self.path, e)
+            )
+
+    def _entry(self, name):
+        return self.decoders.setdefault(
+            name, {"attempts": 0, "successes": 0, "seconds": {}}
+        )
+
+    @staticmethod
+    def _bucket(size):
+        """Inputs are timed in power-of-two size classes."""
+        return max(size, 1).bit_length()
+
+    def record(self, name, size, seconds, success):
+        entry = self._entry(name)
+        entry["attempts"] += 1
+        if success:
+            entry["successes"] += 1
+        timings = entry["seconds"]
+        bucket = str(self._bucket(size))
+        if bucket in timings:
+            # Exponential moving average, so one-off hiccups fade out.
+            seconds = 0.8 * timings[bucket] + 0.2 * seconds
+        timings[bucket] = seconds
+
+    def cost(self, name, size):
+        """Expected seconds to run decoder `name` on `size` bytes."""
+        timings = self.decoders.get(name, {}).get("seconds", {})
+        if not timings:
+            per_byte = DEFAULT_SECONDS_PER_BYTE.get(name, 1e-7)
+            return DEFAULT_SECONDS_PER_CALL + per_byte * size
+        bucket = self._bucket(size)
+        nearest = min(timings, key=lambda b: abs(int(b) - bucket))
+        # Scale timings from other size classes linearly with size.
+        return timings[nearest] * 2.0 ** (bucket - int(nearest))
+
+    def probability(self, name):
+        """Laplace-smoothed probability that decoder `name` is confident."""
+        entry = self.decoders.get(name, {})
+        return (entry.get("successes", 0) + 1) / (entry.get("attempts", 0) + 2)
+
+    def schedule(self, size, names=None):
+        """
+        Order decoders by expected cost per chance of success,
+        which minimizes the expected time to the first confident result.
+        Ties keep the order of decode_string_funcs.
+        """
+        if names is None:
+            names = decode_string_funcs.keys()
+        return sorted(
+            names,
+            key=lambda name: self.cost(name, size) / self.probability(name),
+        )
+
+
+def decode_scheduled(unknown_bytes, stats, threshold=None, names=None):
+    """
+    Run decoders in the order chosen by `stats`, recording their timings.
+    If `threshold` is given, stop after the first result
+    that scores at least `threshold`.
+    """
+    size = len(unknown_bytes)
+    results = collections.OrderedDict()
+    success_threshold = DEFAULT_CONFIDENCE if threshold is None else threshold
+    for name in stats.schedule(size, names):
+        func = decode_string_funcs[name]
+        start = time.perf_counter()
+        decoded_bytes = decode_bytes(unknown_bytes, func, name)
+        elapsed = time.perf_counter() - start
+        results[name] = decoded_bytes
+        score = score_decoding(unknown_bytes, decoded_bytes, name)
+        stats.record(name, size, elapsed, score >= success_threshold)
+        logging.debug("{}: {:.6f} s, score {:.3f}".format(name, elapsed, score))
+        if threshold is not None and score >= threshold:
+            logging.info("stopping early after confident {}".format(name))
+            break
+    return results
+
+
+# The classifier guesses the encoding from a few statistics of the input
+# so that only the most likely decoders need to run.
+# The model is a table of per-encoding feature means and variances
+# (Gaussian naive Bayes) built by benchmarks/train_classifier.py.
+CLASSIFIER_MODEL_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "encoding_model.json"
+)
+CLASSIFIER_SAMPLE = 8 * 1024
+
+
+_LETTERS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_DIGITS = b"0123456789"
+_BASE64_ALPHABET = _LETTERS + _DIGITS + b"+/="
+_BASE32_ALPHABET = _LETTERS[:26] + b"234567="
+_BASE16_ALPHABET = _DIGITS + b"ABCDEF"
+_ASCII85_ALPHABET = bytes(range(ord("!"), ord("u") + 1)) + b"zy"
+_BASE85_ALPHABET = _LETTERS + _DIGITS + b"!#$%&()*+-;<=>?@^_`{|}~"
+_UPPER = _LETTERS[:26]
+_LOWER = _LETTERS[26:]
+_BLANK = b" \t"
+_NEWLINE = b"\r\n"
+_BINARY = bytes(range(0, 9)) + bytes(range(128, 256))
+
+# Each escape family is counted by its markers with bytes.count(),
+# which is far cheaper than matching whole escapes with a regex;
+# the model learns how often the markers occur in other encodings.
+_FEATURE_MARKERS = (
+    (3, (b"=",)),
+    (3, (b"%",)),
+    (6, (b"&#", b"&amp;", b"&lt;", b"&gt;", b"&quot;", b"&apos;")),
+    (4, (b"\\x", b"\\u")),
+    (6, (b"%u",)),
+    (1, (b"0x", b"0X", b"CHAR(", b"CHR(", b"char(", b"chr(")),
+)
+
+FEATURE_NAMES = (
+    "base64 alphabet",
+    "base32 alphabet",
+    "base16 alphabet",
+    "ascii85 alphabet",
+    "base85 alphabet",
+    "uppercase",
+    "lowercase",
+    "digits",
+    "blanks",
+    "newlines",
+    "binary bytes",
+    "trailing =",
+    "lines of 76",
+    "lines of 64",
+    "lines of 61",
+    "= density",
+    "% density",
+    "&#/&name; density",
+    "\\x/\\u density",
+    "%u density",
+    "0x/CHAR( density",
+    "uu begin line",
+    "binhex header",
+    "ascii85 frame",
+)
+
+
+def encoding_features(unknown_bytes):
+    """
+    Return a tuple of features (mostly fractions between 0 and 1)
+    describing the first CLASSIFIER_SAMPLE bytes of `unknown_bytes`.
+    """
+    sample = unknown_bytes[:CLASSIFIER_SAMPLE]
+    size = max(len(sample), 1)
+
+    # bytes.translate() deletes a set of bytes in one C loop,
+    # so what it leaves tells how many there were.
+    def count(byte_set):
+        return len(sample) - len(sample.translate(None, byte_set))
+
+    def fraction(byte_set, total=size):
+        return count(byte_set) / max(total, 1)
+
+    content = size - count(_BLANK + _NEWLINE)
+    stripped = sample.rstrip()
+    lines = sample.replace(b"\r\n", b"\n").split(b"\n")
+    line_lengths = collections.Counter(map(len, lines))
+    escapes = [
+        weight * sum(sample.count(marker) for marker in markers) / size
+        for weight, markers in _FEATURE_MARKERS
+    ]
+    return (
+        fraction(_BASE64_ALPHABET, content),
+        fraction(_BASE32_ALPHABET, content),
+        fraction(_BASE16_ALPHABET, content),
+        fraction(_ASCII85_ALPHABET, content),
+        fraction(_BASE85_ALPHABET, content),
+        fraction(_UPPER),
+        fraction(_LOWER),
+        fraction(_DIGITS),
+        fraction(_BLANK),
+        fraction(_NEWLINE),
+        fraction(_BINARY),
+        float(stripped.endswith(b"=")),
+        line_lengths[76] / len(lines),
+        line_lengths[64] / len(lines),
+        line_lengths[61] / len(lines),
+        *escapes,
+        float(sample.startswith(b"begin ") or b"\nbegin " in sample),
+        float(_BINHEX_MARKER in sample),
+        float(stripped.startswith(b"<~") or stripped.endswith(b"~>")),
+    )
+
+
+_classifier_models = {}
+
+
+def load_classifier_model(path=CLASSIFIER_MODEL_FILE):
+    """
+    Load the model at `path`, once per path.
+    A model whose features do not match is not kept.
+    """
+    try:
+        return _classifier_models[path]
+    except KeyError:
+        pass
+    with open(path) as f:
+        model = json.load(f)
+    if model["features"] != list(FEATURE_NAMES):
+        raise ValueError("classifier model features do not match")
+    _classifier_models[path] = model
+    return model
+
+
+def _gaussian_terms(model):
+    """
+    The parts of each encoding's log-likelihood that do not depend
+    on the input: log prior minus the normalizing terms, the means,
+    and 1 / (2 variance) for each feature. Cached in the model.
+    """
+    try:
+        return model["_terms"]
+    except KeyError:
+        pass
+    terms = {}
+    for name, params in model["encodings"].items():
+        constant = math.log(params["prior"]) - 0.5 * sum(
+            math.log(2 * math.pi * var) for var in params["var"]
+        )
+        weights = [0.5 / var for var in params["var"]]
+        terms[name] = (constant, params["mean"], weights)
+    model["_terms"] = terms
+    return terms
+
+
+def predict_encodings(unknown_bytes, model=None):
+    """
+    Return decoder names, most likely first.
+    Decoders the model knows nothing about are kept, after the ranked ones.
+    """
+    if model is None:
+        model = load_classifier_model()
+    features = encoding_features(unknown_bytes)
+    scores = {}
+    for name, (constant, means, weights) in _gaussian_terms(model).items():
+        scores[name] = constant - sum(
+            (x - mean) ** 2 * weight
+            for x, mean, weight in zip(features, means, weights)
+        )
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return ranked + [name for name in decode_string_funcs if name not in scores]
+
+
+def top_k_encodings(unknown_bytes, k):
+    """
+    The k most likely decoders, plus any the model cannot rank.
+    Falls back to all decoders if the model cannot be loaded.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1, not {}".format(k))
+    try:
+        model = load_classifier_model()
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning("not using classifier model: {}".format(e))
+        return list(decode_string_funcs.keys())
+    ranked = predict_encodings(unknown_bytes, model)
+    known = [name for name in ranked if name in model["encodings"]]
+    unknown = [name for name in ranked if name not in model["encodings"]]
+    return known[:k] + unknown
+
+
+def read_records(infile, delimiter=b"\n"):
+    """
+    Yield each `delimiter`-terminated record from a binary file
+    as soon as it has arrived, without waiting for EOF.
+    """
+    # read1() returns whatever is available instead of filling a buffer.
+    read = getattr(infile, "read1", infile.read)
+    pending = []
+    while True:
+        chunk = read(64 * 1024)
+        if not chunk:
+            break
+        parts = chunk.split(delimiter)
+        if len(parts) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(parts[0])
+        yield b"".join(pending)
+        yield from parts[1:-1]
+        pending = [parts[-1]]
+    tail = b"".join(pending)
+    if tail:
+        yield tail
+
+
+FOLLOW_WORKERS = 4
+
+
+def follow(
+    infile,
+    outfile=None,
+    delimiter=b"\n",
+    workers=FOLLOW_WORKERS,
+    k=None,
+    decompress_limit=DECOMPRESS_PREFIX,
+):
+    """
+    Decode each record of `infile` as its own input
+    and write the results to `outfile` as soon as each one is done.
+    Records are decoded by a pool of `workers` threads,
+    so output can come out of order; each block starts with its record number.
+    Returns the list of per-record latencies in seconds.
+    """
+    if outfile is None:
+        outfile = sys.stdout
+    write_lock = threading.Lock()
+    # Limit how many records can be waiting,
+    # so a fast producer is slowed down instead of using unbounded memory.
+    in_flight = threading.BoundedSemaphore(workers * 4)
+    latencies = []
+
+    def work(index, record, arrived):
+        try:
+            names = None if k is None else top_k_encodings(record, k)
+            results = decode_all(record, names)
+            skipped = [n for n in decode_string_funcs if n not in results]
+            results = add_decompressed(record, results, decompress_limit)
+            text = io.StringIO()
+            print("==> record {} <==".format(index), file=text)
+            print_summary(
+                *summarize(record, results), skipped=skipped, file=text
+            )
+            with write_lock:
+                outfile.write(text.getvalue())
+                outfile.flush()
+                latency = time.perf_counter() - arrived
+                latencies.append(latency)
+            logging.debug("record {}: {:.6f} s".format(index, latency))
+        except Exception:
+            logging.exception("record {} failed".format(index))
+        finally:
+            in_flight.release()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        index = 0
+        for record in read_records(infile, delimiter):
+            if not record.strip():
+                continue
+            arrived = time.perf_counter()
+            index += 1
+            in_flight.acquire()
+            pool.submit(work, index, record, arrived)
+    if latencies:
+        ordered = sorted(latencies)
+        logging.info(
+            "{} records, latency median {:.6f} s, max {:.6f} s".format(
+                len(ordered), ordered[len(ordered) // 2], ordered[-1]
+            )
+        )
+    return latencies
+
+
+# The asyncio API runs the (blocking) decoders in a shared executor
+# so that callers such as web services do not stall their event loop.
+# Nearly all of them hold the GIL while they run, so threads only keep
+# the loop responsive for small inputs; larger ones go to the shared
+# process pool from get_process_pool().
+# The semaphore caps how many decoder calls can be queued or running
+# at once across all callers on a loop.
+# asyncio itself is only imported when the API is used,
+# since it takes up about half the start-up time of the script.
+ASYNC_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+ASYNC_CONCURRENCY = ASYNC_MAX_WORKERS * 2
+ASYNC_PROCESS_THRESHOLD = 16 * 1024
+
+_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="try_decodings"
+        )
+    return _executor
+
+
+def _get_semaphore(loop):
+    import asyncio
+
+    try:
+        return _semaphores[loop]
+    except KeyError:
+        semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        _semaphores[loop] = semaphore
+        return semaphore
+
+
+async def _run_limited(executor, func, *args):
+    """
+    Run func(*args) in `executor`, holding a slot of the loop's semaphore
+    until the job has finished or been taken off the executor's queue,
+    not merely until the caller stops waiting for it.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    semaphore = _get_semaphore(loop)
+    await semaphore.acquire()
+    try:
+        job = executor.submit(func, *args)
+    except BaseException:
+        semaphore.release()
+        raise
+
+    def release(job):
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:  # The loop is closed.
+            pass
+
+    job.add_done_callback(release)
+    # Cancelling this also cancels the job if it has not started yet.
+    return await asyncio.wrap_future(job)
+
+
+def _decode_named(unknown_bytes, encoding):
+    """decode_bytes() for a registered decoder, which can be pickled."""
+    return decode_bytes(unknown_bytes, decode_string_funcs[encoding], encoding)
+
+
+async def decode_bytes_async(unknown_bytes, func, encoding):
+    """
+    Like decode_bytes(), but run in the shared thread pool.
+    Cancelling the caller stops waiting on the result,
+    but a decoder that has already started runs to completion in its thread.
+    """
+    return await _run_limited(
+        get_executor(), decode_bytes, unknown_bytes, func, encoding
+    )
+
+
+async def decode_all_async(
+    unknown_bytes, names=None, timeout=None, processes=None
+):
+    """
+    Like decode_all(), but the decoders run concurrently
+    without blocking the event loop: in the shared process pool
+    if `processes` is true, in the shared thread pool if it is false,
+    and by default depending on whether the input is at least
+    ASYNC_PROCESS_THRESHOLD bytes.
+    Raises asyncio.TimeoutError if they do not all finish within `timeout`.
+    """
+    import asyncio
+
+    if names is None:
+        names = list(decode_string_funcs.keys())
+    if processes is None:
+        processes = len(unknown_bytes) >= ASYNC_PROCESS_THRESHOLD
+    if not processes:
+        pool = get_executor()
+    elif _process_pool_started:
+        pool = get_process_pool()
+    else:
+        pool = await _run_limited(get_executor(), start_process_pool)
+    # The escape decoders share one scan of the input, so they are one job.
+    escapes = [
+        name
+        for name in names
+        if hasattr(decode_string_funcs[name], "escape_family")
+    ]
+    others = [name for name in names if name not in escapes]
+    coros = [_run_limited(pool, decode_all, unknown_bytes, escapes)]
+    if processes:
+        coros += [
+            _run_limited(pool, _decode_named, unknown_bytes, name)
+            for name in others
+        ]
+    else:
+        coros += [
+            decode_bytes_async(unknown_bytes, decode_string_funcs[name], name)
+            for name in others
+        ]
+    escaped, *decoded = await asyncio.wait_for(asyncio.gather(*coros), timeout)
+    escaped.update(zip(others, decoded))
+    return collections.OrderedDict((name, escaped[name]) for name in names)
+
+
+async def decode_and_summarize_async(
+    unknown_bytes, names=None, timeout=None, processes=None
+):
+    results = await decode_all_async(unknown_bytes, names, timeout, processes)
+    # The decompressors release the GIL, so a thread will do;
+    # summarizing takes a while on big outputs too, so it goes along.
+    return await _run_limited(
+        get_executor(), _decompress_and_summarize, unknown_bytes, results
+    )
+
+
+def _decompress_and_summarize(unknown_bytes, results):
+    return summarize(unknown_bytes, add_decompressed(unknown_bytes, results))
+
+
+def _outcome(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        return type(e), str(e)
+
+
+def fuzz_fast_decoders(rounds=3000, seed=0):
+    """Check the NumPy decoders against the stdlib on mangled encodings."""
+    import random
+
+    rng = random.Random(seed)
+    cases = (
+        (fast_b32decode, base64.b32decode, base64.b32encode, {}),
+        (fast_b85decode, base64.b85decode, base64.b85encode, {}),
+        (fast_a85decode, base64.a85decode, base64.a85encode, {}),
+        (
+            fast_a85decode,
+            base64.a85decode,
+            functools.partial(base64.a85encode, foldspaces=True, wrapcol=20),
+            {"foldspaces": True},
+        ),
+        (
+            fast_a85decode,
+            base64.a85decode,
+            functools.partial(base64.a85encode, adobe=True, wrapcol=30),
+            {"adobe": True},
+        ),
+    )
+    noise = b"z y ~>=\n\x00\xff!u~}<~AZaz27"
+    for _ in range(rounds):
+        fast, slow, encode, kwargs = rng.choice(cases)
+        size = rng.randint(0, 300)
+        plain = bytes(rng.choice(b"\0\0\0\0    ab\xff") for _ in range(size))
+        encoded = bytearray(encode(plain))
+        for _ in range(rng.choice((0, 0, 1, 3))):
+            position = rng.randint(0, len(encoded))
+            change = rng.choice(("insert", "delete", "replace"))
+            if change != "insert" and position < len(encoded):
+                del encoded[position]
+            if change != "delete":
+                encoded[position:position] = bytes([rng.choice(noise)])
+        encoded = bytes(encoded)
+        expected = _outcome(slow, encoded, **kwargs)
+        actual = _outcome(fast, encoded, **kwargs)
+        assert actual == expected, "{} differs from {} on {!r}".format(
+            fast.__name__, slow.__name__, encoded
+        )
+    print("{} fuzzed inputs decoded identically.".format(rounds))
+
+
+def fuzz_escape_decoders(rounds=2000, seed=0):
+    """
+    Check the HTML decoder against html.unescape() on noisy text,
+    that one scan for all families decodes each one as its decoder does
+    on its own, and round-trip every escape encoding through its decoder.
+    """
+    import random
+
+    rng = random.Random(seed)
+    fragments = (
+        "&amp;",
+        "&lt",
+        "&#39;",
+        "&#x263a;",
+        "&#xZ;",
+        "&eacute",
+        "&notin;",
+        "&bogus;",
+        "&",
+        "#",
+        ";",
+        "%u",
+        "%41",
+        "=",
+        "\\",
+        "0x",
+        "CHAR(",
+        "chr(",
+        ")",
+        "%3",
+        "=3",
+        "\\x3",
+        "&#3",
+        "99999999999",
+        "1114112",
+        "a",
+        "7",
+        "F",
+        " ",
+        "\n",
+        "é",
+        "☃",
+    )
+    escapes = list(decode_string_funcs)
+    escapes = escapes[escapes.index("MIME quoted-printable") :]
+    for _ in range(rounds):
+        size = rng.randint(0, 40)
+        text = "".join(rng.choice(fragments) for _ in range(size))
+        in_bytes = text.encode()
+        assert (
+            decode_escapes(in_bytes, "html") == html.unescape(text).encode()
+        ), "HTML differs from html.unescape() on {!r}".format(text)
+        found = scan_escapes(in_bytes)
+        together = decode_escape_families(in_bytes)
+        for family in ESCAPE_FAMILIES:
+            alone = decode_escapes(in_bytes, family)
+            assert (
+                together[family] == alone
+            ), "{} differs when decoded with the others on {!r}".format(
+                family, text
+            )
+            if family != "qp":
+                assert (
+                    _splice(in_bytes, found.get(family, ())) == alone
+                ), "scan_escapes() finds other {} on {!r}".format(family, text)
+        for encoding in escapes:
+            if encoding == "SQL literals" and not in_bytes:
+                continue  # A bare 0x is not a literal.
+            encoded = encode_string_funcs[encoding](in_bytes)
+            decoded = decode_string_funcs[encoding](encoded)
+            assert decoded == in_bytes, "{} round trip failed on {!r}".format(
+                encoding, text
+            )
+    print("{} fuzzed escape inputs decoded as expected.".format(rounds))
+
+
+def fuzz_decompress(rounds=2000, seed=0):
+    """
+    Check that decompress() survives corrupted and truncated archives
+    and never returns more than it was asked for.
+    """
+    import gzip
+    import random
+
+    rng = random.Random(seed)
+    payload = b"".join(
+        rng.choice((b"spam ", b"eggs\n", b"\x00" * 50)) for _ in range(400)
+    )
+    archives = [
+        gzip.compress(payload),
+        zlib.compress(payload),
+        bz2.compress(payload),
+    ]
+    if lzma is not None:
+        archives.append(lzma.compress(payload))
+    for method in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", method) as out:
+            out.writestr("payload.txt", payload)
+        archives.append(archive.getvalue())
+    limit = len(payload) // 3
+    for _ in range(rounds):
+        data = bytearray(rng.choice(archives))
+        for _ in range(rng.randint(0, 4)):
+            data[rng.randrange(len(data))] = rng.randrange(256)
+        if rng.random() < 0.3:
+            del data[rng.randrange(len(data)) :]
+        data = bytes(data)
+        try:
+            found = decompress(data, limit)
+        except Exception as e:
+            raise AssertionError(
+                "decompress() raised {!r} on {!r}".format(e, data)
+            )
+        assert (
+            found is None or len(found[1]) <= limit
+        ), "decompress() went past its limit on {!r}".format(data)
+    print("{} fuzzed archives decompressed safely.".format(rounds))
+
+
+def fuzz_stream_encoders(rounds=300, seed=0):
+    """
+    Check that every streaming encoder, fed in chunks of various sizes,
+    decodes to the same bytes as its encode_string_funcs counterpart.
+    """
+    import random
+
+    rng = random.Random(seed)
+    # Some string encoders only take UTF-8, e.g. ROT13.
+    fragments = ("a", " ", "\t", "\r", "\n", "\r\n", "=", "é", "x" * 90)
+    for _ in range(rounds):
+        size = rng.randint(0, 40)
+        text = "".join(rng.choice(fragments) for _ in range(size))
+        in_bytes = text.encode()
+        chunk_size = rng.choice((1, 2, 3, 7, 64, ENCODE_CHUNK))
+        for encoding, stream in stream_encode_funcs.items():
+            decode = decode_string_funcs[encoding]
+            if encoding == "SQL literals" and not in_bytes:
+                continue  # A bare 0x is not a literal.
+            streamed = b"".join(stream(io.BytesIO(in_bytes), chunk_size))
+            expected = decode(encode_string_funcs[encoding](in_bytes))
+            assert (
+                decode(streamed) == expected
+            ), "{} streamed in {}-byte chunks differs on {!r}".format(
+                encoding, chunk_size, in_bytes
+            )
+    print("{} fuzzed inputs streamed as expected.".format(rounds))
+
+
+def fuzz_parallel_decode(rounds=200, seed=0):
+    """
+    Check parallel_decode(), cutting mangled encodings into small pieces,
+    against the stdlib: where it does not give up, it must agree.
+    """
+    import random
+
+    rng = random.Random(seed)
+    cases = (
+        ("Base64", base64.standard_b64decode, base64.encodebytes, True),
+        ("Base64", base64.standard_b64decode, base64.b64encode, False),
+        ("Base32", base64.b32decode, base64.b32encode, False),
+        ("Base16", base64.b16decode, base64.b16encode, False),
+    )
+    noise = b"=\n \x00!-_aAz7"
+    with new_process_pool(2) as pool:
+        for _ in range(rounds):
+            encoding, stdlib, encode, ignore_whitespace = rng.choice(cases)
+            plain = bytes(
+                rng.randrange(256) for _ in range(rng.randint(0, 400))
+            )
+            encoded = bytearray(encode(plain))
+            changes = rng.choice((0, 0, 1, 3))
+            for _ in range(changes):
+                position = rng.randint(0, len(encoded))
+                change = rng.choice(("insert", "delete", "replace"))
+                if change != "insert" and position < len(encoded):
+                    del encoded[position]
+                if change != "delete":
+                    encoded[position:position] = bytes([rng.choice(noise)])
+            encoded = bytes(encoded)
+            chunk_size = rng.choice((1, 8, 40, 77, 160))
+            expected = _outcome(stdlib, encoded)
+            try:
+                actual = parallel_decode(
+                    encoded, encoding, pool, chunk_size, ignore_whitespace
+                )
+            except binascii.Error:
+                # Giving up is fine, but not on clean input
+                # cut into pieces longer than its lines.
+                assert (
+                    changes or chunk_size < 80
+                ), "parallel {} gave up on {!r}".format(encoding, encoded)
+                continue
+            assert (
+                actual == expected
+            ), "parallel {} in {}-byte pieces differs on {!r}".format(
+                encoding, chunk_size, encoded
+            )
+    print("{} fuzzed inputs decoded in parallel as expected.".format(rounds))
 
 
 def self_test():
@@ -830,11 +3223,59 @@ def self_test():
             decode_bytes(encoded_bytes, decode_string_funcs[encoding], encoding)
             == test_bytes
         ), "Round-tripping printable ASCII characters failed."
+    # A truncated BinHex segment has to fail, not loop forever,
+    # and must not hide the segments after it.
+    binhexed = encode_string_funcs["BinHex"](test_bytes)
+    truncated = binhexed[: binhexed.index(b":") + 60] + b":"
+    assert (
+        decode_bytes(truncated, decode_string_funcs["BinHex"], "BinHex") is None
+    ), "A truncated BinHex segment decoded."
+    assert (
+        hexbin_bytes(truncated + b"\n" + binhexed) == test_bytes
+    ), "A truncated BinHex segment hid the one after it."
+    # CHAR() values beyond Unicode are not characters; leave them alone.
+    for too_big in (b"CHAR(1114112)", b"CHAR(99999999999999999999)"):
+        assert (
+            decode_escapes(too_big, "sql") == too_big
+        ), "{!r} decoded.".format(too_big)
+    fuzz_escape_decoders()
+    fuzz_stream_encoders()
+    fuzz_decompress()
+    fuzz_parallel_decode()
+    if numpy is None:
+        print("NumPy is not installed; not fuzzing the fast decoders.")
+    else:
+        fuzz_fast_decoders()
+
+
+def positive_int(text):
+    """argparse type for --top-k and --workers."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("{} is less than 1".format(text))
+    return value
+
+
+def non_negative_int(text):
+    """argparse type for --wrap."""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError("{} is negative".format(text))
+    return value
+
+
+def confidence_level(text):
+    """argparse type for --confidence."""
+    value = float(text)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError(
+            "{} is not greater than 0 and at most 1".format(text)
+        )
+    return value
 
 
 if __name__ == "__main__":
     # TODO: add an --encodings flag to list encodings.
-    # TODO: add a --reverse flag to encode instead of decode.
     parser = argparse.ArgumentParser(
         description="Try binary-to-ascii decodings on a given file or stdin."
     )
@@ -858,6 +3299,76 @@ if __name__ == "__main__":
     parser.add_argument(
         "--self-test", help="Run a self-test", action="store_true"
     )
+    parser.add_argument(
+        "-r",
+        "--reverse",
+        help="Encode the input with ENCODING instead of decoding it",
+        metavar="ENCODING",
+        choices=list(stream_encode_funcs.keys()),
+    )
+    parser.add_argument(
+        "-w",
+        "--wrap",
+        help="With --reverse, wrap Base64, Base32, Base16, Ascii85 "
+        "and Base85 lines at COLS (default {}, 0 to disable)".format(
+            WRAP_COLUMNS
+        ),
+        metavar="COLS",
+        type=non_negative_int,
+        default=WRAP_COLUMNS,
+    )
+    parser.add_argument(
+        "--first",
+        help="Stop at the first confident decoding, trying likely and cheap "
+        "decoders first",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--confidence",
+        help="Like --first, with a confidence threshold between 0 and 1 "
+        "(default {})".format(DEFAULT_CONFIDENCE),
+        type=confidence_level,
+    )
+    parser.add_argument(
+        "--top-k",
+        help="Only try the K decoders the classifier thinks most likely",
+        type=positive_int,
+        metavar="K",
+    )
+    parser.add_argument(
+        "--decompress-all",
+        help="Show all of any compressed output, up to {} bytes, "
+        "instead of the first {}".format(DECOMPRESS_LIMIT, DECOMPRESS_PREFIX),
+        dest="decompress_limit",
+        default=DECOMPRESS_PREFIX,
+        action="store_const",
+        const=DECOMPRESS_LIMIT,
+    )
+    parser.add_argument(
+        "-f",
+        "--follow",
+        help="Decode each line of input as soon as it arrives",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-z",
+        "--null",
+        help="With --follow, records are separated by NUL, not newline",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="With --follow, decode this many records at once "
+        "(default {})".format(FOLLOW_WORKERS),
+        type=positive_int,
+        default=FOLLOW_WORKERS,
+    )
+    parser.add_argument(
+        "--cost-file",
+        help="Where to keep decoder timings between runs "
+        "(default {})".format(default_cost_file()),
+        default=default_cost_file(),
+    )
     # TODO: should this be a filter by default,
     # or should it require a `-' argument to function that way
     # so that --self-test and infile can be mutually exclusive arguments?
@@ -869,6 +3380,8 @@ if __name__ == "__main__":
         help="Input file (or stdin)",
     )
     args = parser.parse_args()
+    if args.follow and (args.first or args.confidence is not None):
+        parser.error("--follow cannot be combined with --first or --confidence")
     logging.basicConfig(level=args.loglevel)
     if args.self_test:
         if args.infile != sys.stdin.buffer:
@@ -878,5 +3391,49 @@ if __name__ == "__main__":
                 )
             )
         self_test()
+    elif args.reverse:
+        try:
+            encode_stream(
+                args.reverse, args.infile, sys.stdout.buffer, args.wrap
+            )
+        except UnicodeDecodeError as e:
+            logging.error("{} needs UTF-8 input: {}".format(args.reverse, e))
+            sys.exit(1)
+        except BrokenPipeError:
+            pass
+    elif args.follow:
+        delimiter = b"\0" if args.null else b"\n"
+        try:
+            follow(
+                args.infile,
+                sys.stdout,
+                delimiter,
+                args.workers,
+                args.top_k,
+                args.decompress_limit,
+            )
+        except KeyboardInterrupt:
+            pass
     else:
-        decode_and_print(args.infile.read())
+        unknown_bytes = args.infile.read()
+        names = None
+        if args.top_k is not None:
+            names = top_k_encodings(unknown_bytes, args.top_k)
+        if args.first or args.confidence is not None:
+            if args.confidence is None:
+                args.confidence = DEFAULT_CONFIDENCE
+            stats = DecoderStats(args.cost_file)
+            decode_and_print(
+                unknown_bytes,
+                stats,
+                args.confidence,
+                names,
+                args.decompress_limit,
+            )
+            stats.save()
+        else:
+            decode_and_print(
+                unknown_bytes,
+                names=names,
+                decompress_limit=args.decompress_limit,
+            )